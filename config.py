@@ -1,33 +1,71 @@
 import os
 import subprocess
+from functools import lru_cache
 
+@lru_cache(maxsize=None)
 def get_hdd_path():
     """Get the path to the external HDD using its label."""
     label = "My Passport"
     base_path = f"/media/parmenides/{label}"
-    
+
     # Check if the drive is mounted
     if not os.path.ismount(base_path):
         raise RuntimeError(f"External HDD '{label}' is not mounted. Please ensure it is connected and mounted.")
-    
+
     return base_path
 
-# Path to external hard drive
-FLASH_DRIVE = get_hdd_path()
-
-# Project directories
-PROJECT_ROOT = os.path.join(FLASH_DRIVE, "ChessAI")
-DATA_DIR = os.path.join(PROJECT_ROOT, "data")
-GAMES_DIR = os.path.join(PROJECT_ROOT, "games")
-MODELS_DIR = os.path.join(PROJECT_ROOT, "models")
-CHECKPOINTS_DIR = os.path.join(PROJECT_ROOT, "checkpoints")
-UTILS_DIR = os.path.join(PROJECT_ROOT, "utils")
-
-# Create directories if they don't exist
-for directory in [PROJECT_ROOT, DATA_DIR, GAMES_DIR, MODELS_DIR, CHECKPOINTS_DIR, UTILS_DIR]:
-    os.makedirs(directory, exist_ok=True)
-
-# File paths
-FILTERED_GAMES_PATH = os.path.join(GAMES_DIR, "lichess_games_filtered.pgn")
-RAW_GAMES_PATH = os.path.join(GAMES_DIR, "lichess_games_raw.pgn")
-COMPRESSED_GAMES_PATH = os.path.join(GAMES_DIR, "lichess_games.pgn.zst")
\ No newline at end of file
+@lru_cache(maxsize=None)
+def get_paths():
+    """
+    Resolve the project paths on the external HDD.
+
+    Nothing touches the filesystem at import time: the mount check runs on the
+    first call and the result is cached for the rest of the process.
+
+    Returns:
+        dict mapping path names (e.g. 'CHECKPOINTS_DIR') to absolute paths
+    """
+    # Path to external hard drive
+    flash_drive = get_hdd_path()
+
+    # Project directories
+    project_root = os.path.join(flash_drive, "ChessAI")
+    games_dir = os.path.join(project_root, "games")
+
+    return {
+        'FLASH_DRIVE': flash_drive,
+        'PROJECT_ROOT': project_root,
+        'DATA_DIR': os.path.join(project_root, "data"),
+        'GAMES_DIR': games_dir,
+        'MODELS_DIR': os.path.join(project_root, "models"),
+        'CHECKPOINTS_DIR': os.path.join(project_root, "checkpoints"),
+        'UTILS_DIR': os.path.join(project_root, "utils"),
+
+        # File paths
+        'FILTERED_GAMES_PATH': os.path.join(games_dir, "lichess_games_filtered.pgn"),
+        'RAW_GAMES_PATH': os.path.join(games_dir, "lichess_games_raw.pgn"),
+        'COMPRESSED_GAMES_PATH': os.path.join(games_dir, "lichess_games.pgn.zst"),
+    }
+
+# Layout of pieces/atlas.png, written by download_pieces.py and read by gui.py:
+# one row per color, with the pieces of each row in this order
+PIECE_ATLAS_FILENAME = 'atlas.png'
+PIECE_ATLAS_ROWS = ('KQRBNP', 'kqrbnp')
+
+def ensure_dirs():
+    """Create the project directories if they don't exist. Call from entry points, not at import."""
+    paths = get_paths()
+    for name in ['PROJECT_ROOT', 'DATA_DIR', 'GAMES_DIR', 'MODELS_DIR', 'CHECKPOINTS_DIR', 'UTILS_DIR']:
+        os.makedirs(paths[name], exist_ok=True)
+
+# Names that get_paths() resolves, also readable as module attributes
+PATH_NAMES = (
+    'FLASH_DRIVE', 'PROJECT_ROOT', 'DATA_DIR', 'GAMES_DIR', 'MODELS_DIR', 'CHECKPOINTS_DIR', 'UTILS_DIR',
+    'FILTERED_GAMES_PATH', 'RAW_GAMES_PATH', 'COMPRESSED_GAMES_PATH',
+)
+
+def __getattr__(name):
+    # Keep `config.CHECKPOINTS_DIR` style access working, resolved on first use
+    if name in PATH_NAMES:
+        return get_paths()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
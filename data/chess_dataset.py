@@ -1,21 +1,278 @@
 import chess
-import chess.pgn
 import numpy as np
 import torch
 from torch.utils.data import Dataset, IterableDataset
 import os
+import re
 from tqdm import tqdm
 import mmap
+import json
 import pickle
 import tempfile
+import hashlib
+import shutil
+import multiprocessing
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+import zstandard as zstd
 
-from utils.board_utils import encode_board, move_to_index
+from utils.board_utils import encode_bitboards, move_to_index
+
+# Initial number of positions to allocate per parsed range
+INITIAL_CAPACITY = 1 << 16
+
+# Arrays written by InMemoryChessDataset.save, in file order
+DATASET_ARRAYS = ('bitboards', 'move_indices', 'values')
+
+# Number of games parsed per file to estimate the dataset length
+LENGTH_SAMPLE_GAMES = 1000
+
+# Size of the byte ranges PGN files are split into for parallel parsing
+PARSE_RANGE_BYTES = 64 * 1024 * 1024
+
+# Bytes hashed from each end of a PGN file to build the dataset cache key
+CACHE_KEY_SAMPLE_BYTES = 1 << 20
+
+# Bump whenever the sample encoding changes so stale caches are ignored
+CACHE_FORMAT_VERSION = 1
+
+# Bytes the streaming dataset asks the kernel to fetch ahead of the game being parsed
+PREFETCH_BYTES = 4 * 1024 * 1024
+
+# Buffer size for streamed (non-mmapped) reads of PGN files
+READ_BUFFER_BYTES = 8 * 1024 * 1024
+
+# Extension of zstd-compressed PGN files, which are decompressed on the fly
+ZSTD_SUFFIX = '.zst'
+
+# Precompiled patterns for the lightweight PGN scanner
+_GAME_SPLIT_RE = re.compile(rb"\n\s*\n(?=\[Event )")
+_HEADER_END_RE = re.compile(rb"\n\s*\n")
+_RESULT_RE = re.compile(rb'\[Result "([^"]*)"\]')
+_FEN_RE = re.compile(rb'\[FEN "([^"]*)"\]')
+_COMMENT_RE = re.compile(rb"\{[^}]*\}|;[^\n]*|\$\d+")
+_VARIATION_RE = re.compile(rb"\([^()]*\)")
+_MOVE_RE = re.compile(rb"[KQRBN]?[a-h]?[1-8]?x?[a-h][1-8](?:=?[QRBN])?|O-O(?:-O)?")
+
+def _find_game_start(mm, offset):
+    """Return the offset of the first '[Event ' line at or after offset in a memory-mapped file."""
+    if offset == 0:
+        return 0
+    pos = mm.find(b'\n[Event ', offset - 1)
+    return len(mm) if pos == -1 else pos + 1
+
+def _advise_sequential(f, offset=0, length=0, willneed=False):
+    """
+    Tell the kernel a region of an open file will be read front to back.
+    
+    Sequential access doubles the readahead window, which matters most on
+    spinning disks. A no-op on platforms without posix_fadvise.
+    
+    Args:
+        f: Open file object
+        offset: Start of the region
+        length: Length of the region (0 means up to the end of the file)
+        willneed: Also start reading the region into the page cache right away
+            (only worth it for bounded regions)
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    os.posix_fadvise(f.fileno(), offset, length, os.POSIX_FADV_SEQUENTIAL)
+    if willneed:
+        os.posix_fadvise(f.fileno(), offset, length, os.POSIX_FADV_WILLNEED)
+
+def _map_file(f, populate=False):
+    """
+    Memory-map an open file read-only.
+    
+    Args:
+        f: Open file object
+        populate: Prefault every page up front where supported; only worth it
+            for a one-shot scan of the whole file, as it reads all of it into memory
+    """
+    if populate and hasattr(mmap, 'MAP_POPULATE'):
+        return mmap.mmap(f.fileno(), 0, flags=mmap.MAP_PRIVATE | mmap.MAP_POPULATE, prot=mmap.PROT_READ)
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def _iter_games(data):
+    """
+    Yield the games contained in a buffer of PGN bytes.
+    
+    A lightweight replacement for chess.pgn.read_game when only the result and
+    the mainline are needed: no GameNode tree is built, and comments, NAGs and
+    variations are stripped with regexes before the SAN tokens are extracted.
+    
+    Args:
+        data: bytes holding one or more complete PGN games
+        
+    Yields:
+        tuple (board, value, san_tokens) where board is the starting position,
+        value is the game result from White's perspective and san_tokens is a
+        list of mainline moves as SAN bytes
+    """
+    for game in _GAME_SPLIT_RE.split(data):
+        parts = _HEADER_END_RE.split(game, maxsplit=1)
+        if len(parts) < 2:
+            continue
+        headers, movetext = parts
+        
+        # Extract result
+        match = _RESULT_RE.search(headers)
+        result = match.group(1) if match else b"*"
+        value = 1 if result == b"1-0" else (-1 if result == b"0-1" else 0)
+        
+        match = _FEN_RE.search(headers)
+        board = chess.Board(match.group(1).decode()) if match else chess.Board()
+        
+        # Strip comments and NAGs, then (possibly nested) variations
+        movetext = _COMMENT_RE.sub(b" ", movetext)
+        while b"(" in movetext:
+            stripped = _VARIATION_RE.sub(b" ", movetext)
+            if stripped == movetext:
+                break
+            movetext = stripped
+        
+        yield board, value, _MOVE_RE.findall(movetext)
+
+def _parse_range(pgn_path, byte_start, byte_end, max_positions=None):
+    """
+    Parse the games of a PGN file that start within [byte_start, byte_end).
+    
+    Both bounds are snapped forward to the next game header, so adjacent ranges
+    partition the games of a file exactly. Runs in a worker process.
+    
+    Args:
+        pgn_path: Path to the PGN file
+        byte_start: Start of the byte range
+        byte_end: End of the byte range
+        max_positions: Stop after this many positions (optional)
+        
+    Returns:
+        tuple (bitboards, move_indices, values) of NumPy arrays
+    """
+    with open(pgn_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        _advise_sequential(f, byte_start, byte_end - byte_start, willneed=True)
+        start = _find_game_start(mm, byte_start)
+        end = _find_game_start(mm, byte_end)
+        data = mm[start:end]
+    
+    return _parse_games(data, max_positions)
+
+def _parse_games(data, max_positions=None):
+    """
+    Encode every position of the games in a buffer of PGN bytes. Runs in a worker process.
+    
+    Args:
+        data: bytes holding one or more complete PGN games
+        max_positions: Stop after this many positions (optional)
+        
+    Returns:
+        tuple (bitboards, move_indices, values) of NumPy arrays
+    """
+    capacity = INITIAL_CAPACITY
+    bitboards = np.empty((capacity, 14), dtype=np.uint64)
+    move_indices = np.empty(capacity, dtype=np.int16)
+    values = np.empty(capacity, dtype=np.int8)
+    
+    num_positions = 0
+    for board, value, san_tokens in _iter_games(data):
+        # Apply the position limit and grow the arrays once per game rather than per move
+        if max_positions:
+            san_tokens = san_tokens[:max_positions - num_positions]
+        
+        if num_positions + len(san_tokens) > capacity:
+            while num_positions + len(san_tokens) > capacity:
+                capacity *= 2
+            bitboards = np.resize(bitboards, (capacity, 14))
+            move_indices = np.resize(move_indices, capacity)
+            values = np.resize(values, capacity)
+        
+        for san in san_tokens:
+            try:
+                move = board.parse_san(san.decode())
+            except ValueError:
+                break  # Keep the positions parsed so far and skip the rest of the game
+            
+            encode_bitboards(board, out=bitboards[num_positions])
+            move_indices[num_positions] = move_to_index(move)
+            values[num_positions] = value
+            num_positions += 1
+            
+            board.push(move)
+        
+        if max_positions and num_positions >= max_positions:
+            break
+    
+    return bitboards[:num_positions], move_indices[:num_positions], values[:num_positions]
+
+def _iter_zst_chunks(pgn_path, chunk_size=PARSE_RANGE_BYTES):
+    """
+    Decompress a zstd-compressed PGN file as a stream of whole-game chunks.
+    
+    Each chunk ends just before a game header, so chunks can be parsed
+    independently without ever writing the decompressed file to disk.
+    
+    Args:
+        pgn_path: Path to the .pgn.zst file
+        chunk_size: Approximate number of decompressed bytes per chunk
+        
+    Yields:
+        tuple (data, compressed_bytes) where data is a bytes chunk of complete
+        games and compressed_bytes is the amount of the file consumed for it
+    """
+    dctx = zstd.ZstdDecompressor()
+    with open(pgn_path, 'rb', buffering=READ_BUFFER_BYTES) as f, dctx.stream_reader(f) as reader:
+        _advise_sequential(f)
+        pending = b''
+        consumed = 0
+        while True:
+            block = reader.read(chunk_size)
+            if not block:
+                break
+            pending += block
+            
+            # Hand over everything up to the last game header seen so far
+            split = pending.rfind(b'\n[Event ')
+            if split > 0:
+                position = f.tell()
+                yield pending[:split + 1], position - consumed
+                consumed = position
+                pending = pending[split + 1:]
+        
+        if pending:
+            yield pending, f.tell() - consumed
+
+def collate_samples(batch):
+    """
+    Collate raw samples into batch tensors with a single copy per tensor.
+    
+    Used as the DataLoader collate_fn for every dataset in this module, which
+    yield NumPy bitboard rows and plain ints instead of per-sample tensors.
+    
+    Args:
+        batch: list of (bitboards, move_index, value) samples
+        
+    Returns:
+        tuple (positions, move_indices, values) where positions is an int64 tensor
+        of shape (B, 14) holding the raw bitboards, move_indices is an int64 tensor
+        of shape (B,) and values is an int8 tensor of shape (B, 1) (game results are
+        -1, 0 or 1; convert to float on the training device)
+    """
+    bitboards, move_indices, values = zip(*batch)
+    positions = torch.from_numpy(np.stack(bitboards).view(np.int64))
+    move_indices = torch.tensor(move_indices, dtype=torch.int64)
+    values = torch.tensor(values, dtype=torch.int8).unsqueeze(1)
+    return positions, move_indices, values
 
 class ChessDataset(IterableDataset):
     def __init__(self, pgn_files, max_positions=None):
         """
         Memory-efficient dataset for training the chess model.
         
+        Only game byte offsets are indexed up front; moves are parsed while
+        iterating, so len() is an estimate extrapolated from a sample of games.
+        
         Args:
             pgn_files: List of PGN file paths
             max_positions: Maximum number of positions to load (for debugging)
@@ -32,7 +289,7 @@ class ChessDataset(IterableDataset):
         self._create_index()
     
     def _create_index(self):
-        """Create an index of game positions for efficient access."""
+        """Create an index of game byte offsets for efficient access."""
         print(f"Starting to index games from {len(self.pgn_files)} files...")
         indices = []
         current_pos = 0
@@ -41,45 +298,47 @@ class ChessDataset(IterableDataset):
             if not os.path.exists(pgn_path):
                 print(f"Warning: PGN file not found: {pgn_path}")
                 continue
+            if os.path.getsize(pgn_path) == 0:
+                continue
+            if pgn_path.endswith(ZSTD_SUFFIX):
+                # Compressed files cannot be indexed by byte offset
+                print(f"Warning: Skipping compressed PGN file (use InMemoryChessDataset): {pgn_path}")
+                continue
             
             print(f"\nIndexing file: {pgn_path}")
-            file_positions = 0
             
-            # Count games first
-            game_count = sum(1 for _ in open(pgn_path) if _.startswith('[Event '))
+            with open(pgn_path, 'rb') as f:
+                # Advise before mapping so the prefault reads the file with a large readahead window
+                _advise_sequential(f)
+                mm = _map_file(f, populate=True)
             
-            with open(pgn_path) as pgn:
-                for _ in tqdm(range(game_count), desc="Indexing games", unit="game"):
-                    game = chess.pgn.read_game(pgn)
-                    if game is None:
-                        break
-                    
-                    # Extract result
-                    result = game.headers.get("Result", "*")
-                    value = 1.0 if result == "1-0" else (-1.0 if result == "0-1" else 0.0)
-                    
-                    # Store game start position in file
-                    game_start = pgn.tell()
-                    move_count = sum(1 for _ in game.mainline_moves())
-                    
-                    indices.append((pgn_path, game_start, move_count, value))
-                    file_positions += move_count
-                    current_pos += move_count
-                    
-                    if self.max_positions and current_pos >= self.max_positions:
-                        break
+            with mm:
+                # Find every game header in one pass; the last offset marks the end of the file
+                offsets = [0] if mm[:7] == b'[Event ' else []
+                pos = mm.find(b'\n[Event ')
+                while pos != -1:
+                    offsets.append(pos + 1)
+                    pos = mm.find(b'\n[Event ', pos + 1)
+                offsets.append(len(mm))
+                offsets = np.array(offsets, dtype=np.int64)
+                
+                # Estimate the number of positions from the moves in the first few games
+                sample_end = int(offsets[min(LENGTH_SAMPLE_GAMES, len(offsets) - 1)])
+                sample_positions = sum(len(san_tokens) for _, _, san_tokens in _iter_games(mm[:sample_end]))
+                file_positions = int(len(mm) * sample_positions / max(sample_end, 1))
             
-            print(f"Indexed {file_positions} positions")
-            self.total_positions = current_pos
+            indices.append((pgn_path, offsets))
+            current_pos += file_positions
             
-            if self.max_positions and current_pos >= self.max_positions:
-                break
+            print(f"Indexed {len(offsets) - 1} games (~{file_positions} positions)")
+        
+        self.total_positions = min(current_pos, self.max_positions or current_pos)
         
         # Save indices to temporary file
         with open(self.index_file, 'wb') as f:
             pickle.dump(indices, f)
         
-        print(f"\nFinished indexing: {self.total_positions} total positions")
+        print(f"\nFinished indexing: ~{self.total_positions} total positions")
     
     def __iter__(self):
         worker_info = torch.utils.data.get_worker_info()
@@ -88,33 +347,328 @@ class ChessDataset(IterableDataset):
         with open(self.index_file, 'rb') as f:
             indices = pickle.load(f)
         
-        # Partition indices if using multiple workers
-        if worker_info is not None:
-            per_worker = int(np.ceil(len(indices) / worker_info.num_workers))
-            start = worker_info.id * per_worker
-            end = min(start + per_worker, len(indices))
-            indices = indices[start:end]
+        max_positions = self.max_positions
+        if worker_info is not None and max_positions:
+            # Split the limit so the workers' shares add up to exactly max_positions
+            num_workers = worker_info.num_workers
+            max_positions = max_positions // num_workers + (worker_info.id < max_positions % num_workers)
+            if max_positions == 0:
+                return  # More workers than positions; 0 would otherwise mean no limit
         
         # Process games
-        for pgn_path, game_start, move_count, value in indices:
-            with open(pgn_path) as pgn:
-                pgn.seek(game_start)
-                game = chess.pgn.read_game(pgn)
-                
-                if game is None:
-                    continue
+        num_positions = 0
+        for pgn_path, offsets in self._worker_shards(indices, worker_info):
+            with open(pgn_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # The shard is read front to back, so let the kernel read ahead aggressively
+                byte_start, byte_end = int(offsets[0]), int(offsets[-1])
+                _advise_sequential(f, byte_start, byte_end - byte_start)
+                if hasattr(mmap, 'MADV_SEQUENTIAL'):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
                 
-                board = game.board()
-                for move in game.mainline_moves():
-                    # Create training sample
-                    encoded_board = encode_board(board)
-                    move_index = move_to_index(move)
+                prefetched_until = byte_start
+                for game_start, game_end in zip(offsets[:-1], offsets[1:]):
+                    # Start reading the upcoming games in the background while this one is parsed;
+                    # one fadvise per half window instead of per game keeps the syscall count low
+                    if (hasattr(os, 'posix_fadvise') and max(prefetched_until, game_end) < byte_end
+                            and game_end + PREFETCH_BYTES // 2 > prefetched_until):
+                        prefetch_start = max(prefetched_until, int(game_end))
+                        prefetched_until = min(prefetch_start + PREFETCH_BYTES, byte_end)
+                        os.posix_fadvise(f.fileno(), prefetch_start, prefetched_until - prefetch_start,
+                                         os.POSIX_FADV_WILLNEED)
                     
-                    # Make the move on the board
-                    board.push(move)
-                    
-                    # Yield the sample
-                    yield encoded_board, move_index, value
+                    for board, value, san_tokens in _iter_games(mm[game_start:game_end]):
+                        # Apply the position limit once per game rather than per move
+                        if max_positions:
+                            san_tokens = san_tokens[:max_positions - num_positions]
+                        
+                        for san in san_tokens:
+                            try:
+                                move = board.parse_san(san.decode())
+                            except ValueError:
+                                break
+                            
+                            # Create training sample
+                            encoded_board = encode_bitboards(board)
+                            move_index = move_to_index(move)
+                            
+                            # Make the move on the board
+                            board.push(move)
+                            
+                            # Yield the sample
+                            yield encoded_board, move_index, value
+                            num_positions += 1
+                        
+                        if max_positions and num_positions >= max_positions:
+                            return
+    
+    def _worker_shards(self, indices, worker_info):
+        """
+        Split the indexed files into one contiguous byte range per DataLoader worker.
+        
+        Ranges are balanced by bytes and snapped to game boundaries, so every
+        worker reads its part of each file sequentially without seeking back.
+        
+        Args:
+            indices: List of (pgn_path, offsets) index entries
+            worker_info: torch.utils.data worker info, or None in the main process
+            
+        Returns:
+            list of (pgn_path, offsets) where offsets holds the start of every
+            game in the shard followed by the end of the last one
+        """
+        worker_id, num_workers = (worker_info.id, worker_info.num_workers) if worker_info else (0, 1)
+        total_bytes = sum(int(offsets[-1]) for _, offsets in indices)
+        shard_start = total_bytes * worker_id // num_workers
+        shard_end = total_bytes * (worker_id + 1) // num_workers
+        
+        shards = []
+        file_start = 0
+        for pgn_path, offsets in indices:
+            # Games belong to the shard their first byte falls in
+            lo = np.searchsorted(offsets[:-1], shard_start - file_start)
+            hi = np.searchsorted(offsets[:-1], shard_end - file_start)
+            file_start += int(offsets[-1])
+            if lo < hi:
+                shards.append((pgn_path, offsets[lo:hi + 1]))
+        
+        return shards
+    
+    def __len__(self):
+        return self.total_positions
+
+class InMemoryChessDataset(Dataset):
+    def __init__(self, pgn_files, max_positions=None, num_workers=None):
+        """
+        In-memory dataset that keeps every position in preallocated NumPy arrays.
+        
+        Samples are stored as a Structure-of-Arrays (one contiguous array per
+        field) rather than per-sample Python objects, which keeps memory usage
+        low and allows random access for shuffling. Boards are stored as 14
+        uint64 bitboards (112 bytes per position) and expanded to float planes
+        on the training device with bitboards_to_planes.
+        
+        Args:
+            pgn_files: List of PGN file paths
+            max_positions: Maximum number of positions to load (for debugging)
+            num_workers: Number of processes used to parse PGN files (defaults to CPU count)
+        """
+        self.pgn_files = pgn_files
+        self.max_positions = max_positions
+        self.num_workers = num_workers or os.cpu_count()
+        self.num_positions = 0
+        
+        self._load_games()
+    
+    def _load_games(self):
+        """Parse all PGN files in parallel chunks and concatenate the results."""
+        pgn_files = []
+        for pgn_path in self.pgn_files:
+            if not os.path.exists(pgn_path):
+                print(f"Warning: PGN file not found: {pgn_path}")
+                continue
+            pgn_files.append(pgn_path)
+        
+        print(f"Loading {len(pgn_files)} files with {self.num_workers} processes...")
+        results = []
+        num_positions = 0
+        
+        # Use spawn so workers never inherit CUDA state from the parent
+        mp_context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.num_workers, mp_context=mp_context) as executor, \
+             tqdm(total=sum(os.path.getsize(p) for p in pgn_files),
+                  desc="Loading games", unit='B', unit_scale=True) as pbar:
+            # Keep a bounded number of chunks in flight so decompressed data never piles up in memory
+            jobs = self._iter_jobs(pgn_files)
+            pending = deque()
+            while True:
+                for parse_fn, parse_args, num_bytes in islice(jobs, 2 * self.num_workers - len(pending)):
+                    pending.append((executor.submit(parse_fn, *parse_args, self.max_positions), num_bytes))
+                if not pending:
+                    break
+                
+                future, num_bytes = pending.popleft()
+                result = future.result()
+                results.append(result)
+                num_positions += len(result[1])
+                pbar.update(num_bytes)
+                
+                if self.max_positions and num_positions >= self.max_positions:
+                    break
+            
+            executor.shutdown(cancel_futures=True)
+        
+        if results:
+            self.bitboards = np.concatenate([r[0] for r in results])[:self.max_positions]
+            self.move_indices = np.concatenate([r[1] for r in results])[:self.max_positions]
+            self.values = np.concatenate([r[2] for r in results])[:self.max_positions]
+        else:
+            self.bitboards = np.empty((0, 14), dtype=np.uint64)
+            self.move_indices = np.empty(0, dtype=np.int16)
+            self.values = np.empty(0, dtype=np.int8)
+        self.num_positions = len(self.values)
+        
+        print(f"\nFinished loading: {self.num_positions} total positions")
+    
+    @staticmethod
+    def _iter_jobs(pgn_files):
+        """
+        Split the PGN files into parsing jobs.
+        
+        Plain files are split into byte ranges parsed straight from disk by the
+        workers; compressed files are decompressed here as a stream and their
+        chunks are sent to the workers.
+        
+        Yields:
+            tuple (parse_fn, args, num_bytes) where num_bytes is the size of
+            the job on disk, for progress reporting
+        """
+        for pgn_path in pgn_files:
+            if pgn_path.endswith(ZSTD_SUFFIX):
+                for data, compressed_bytes in _iter_zst_chunks(pgn_path):
+                    yield _parse_games, (data,), compressed_bytes
+                continue
+            
+            file_size = os.path.getsize(pgn_path)
+            for start in range(0, file_size, PARSE_RANGE_BYTES):
+                end = min(start + PARSE_RANGE_BYTES, file_size)
+                yield _parse_range, (pgn_path, start, end), end - start
+    
+    def __getitem__(self, idx):
+        # Raw views are returned; collate_samples builds the batch tensors in one go
+        return self.bitboards[idx], int(self.move_indices[idx]), int(self.values[idx])
+    
+    def __len__(self):
+        return self.num_positions
+    
+    def save(self, directory):
+        """
+        Write the sample arrays to directory as raw binary files for ChessDatasetMmap.
+        
+        Args:
+            directory: Output directory (created if missing)
+        """
+        os.makedirs(directory, exist_ok=True)
+        header = {'num_positions': self.num_positions, 'arrays': {}}
+        for name in DATASET_ARRAYS:
+            array = getattr(self, name)
+            array.tofile(os.path.join(directory, f"{name}.bin"))
+            header['arrays'][name] = {'dtype': array.dtype.str, 'shape': list(array.shape)}
+        
+        with open(os.path.join(directory, 'header.json'), 'w') as f:
+            json.dump(header, f)
+        
+        print(f"Saved {self.num_positions} positions to {directory}")
+
+class ChessDatasetMmap(Dataset):
+    def __init__(self, directory, sequential=False):
+        """
+        Dataset backed by memory-mapped arrays written by InMemoryChessDataset.save.
+        
+        Nothing is parsed or copied at construction: samples are read straight
+        from the page cache, so startup is fast and memory usage only grows with
+        the pages actually touched.
+        
+        Args:
+            directory: Directory containing header.json and the .bin array files
+            sequential: Advise the kernel that samples are read in order (no shuffling)
+        """
+        self.directory = directory
+        self.sequential = sequential
+        
+        with open(os.path.join(directory, 'header.json')) as f:
+            self.header = json.load(f)
+        self.num_positions = self.header['num_positions']
+        
+        self._map_arrays()
+    
+    def _map_arrays(self):
+        """Map every array file into memory as a read-only NumPy array."""
+        for name in DATASET_ARRAYS:
+            info = self.header['arrays'][name]
+            if self.num_positions == 0:
+                array = np.empty(info['shape'], dtype=info['dtype'])
+            else:
+                with open(os.path.join(self.directory, f"{name}.bin"), 'rb') as f:
+                    mm = _map_file(f)
+                if self.sequential and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                array = np.frombuffer(mm, dtype=info['dtype']).reshape(info['shape'])
+            setattr(self, name, array)
+    
+    def __getstate__(self):
+        # Send only the directory to DataLoader workers and remap there instead of copying the arrays
+        state = self.__dict__.copy()
+        for name in DATASET_ARRAYS:
+            del state[name]
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._map_arrays()
+    
+    def __getitem__(self, idx):
+        # Raw views are returned; collate_samples builds the batch tensors in one go
+        return self.bitboards[idx], int(self.move_indices[idx]), int(self.values[idx])
     
     def __len__(self):
-        return self.total_positions
\ No newline at end of file
+        return self.num_positions
+
+def dataset_cache_key(pgn_files, max_positions=None):
+    """
+    Compute a cache key identifying the dataset parsed from a set of PGN files.
+    
+    Only the size and the first and last megabyte of each file are hashed, so
+    the key is cheap to compute even for multi-gigabyte files while still
+    changing whenever a file is replaced or appended to.
+    
+    Args:
+        pgn_files: List of PGN file paths
+        max_positions: Position limit the dataset is parsed with
+        
+    Returns:
+        Hex digest string
+    """
+    key = hashlib.blake2b(digest_size=16)
+    key.update(f"v{CACHE_FORMAT_VERSION}:{max_positions}".encode())
+    for pgn_path in pgn_files:
+        file_size = os.path.getsize(pgn_path)
+        key.update(f"{os.path.basename(pgn_path)}:{file_size}".encode())
+        with open(pgn_path, 'rb') as f:
+            key.update(f.read(CACHE_KEY_SAMPLE_BYTES))
+            if file_size > CACHE_KEY_SAMPLE_BYTES:
+                f.seek(max(file_size - CACHE_KEY_SAMPLE_BYTES, CACHE_KEY_SAMPLE_BYTES))
+                key.update(f.read())
+    return key.hexdigest()
+
+def load_cached_dataset(pgn_files, cache_dir, max_positions=None, num_workers=None):
+    """
+    Load a dataset from the on-disk cache, parsing and caching it on a miss.
+    
+    Args:
+        pgn_files: List of PGN file paths
+        cache_dir: Directory holding one saved dataset per cache key
+        max_positions: Maximum number of positions to load (for debugging)
+        num_workers: Number of processes used to parse PGN files on a miss
+        
+    Returns:
+        ChessDatasetMmap on a cache hit, otherwise the freshly parsed InMemoryChessDataset
+    """
+    pgn_files = [p for p in pgn_files if os.path.exists(p)]
+    directory = os.path.join(cache_dir, dataset_cache_key(pgn_files, max_positions))
+    if os.path.exists(os.path.join(directory, 'header.json')):
+        print(f"Using cached dataset: {directory}")
+        return ChessDatasetMmap(directory)
+    
+    dataset = InMemoryChessDataset(pgn_files, max_positions=max_positions, num_workers=num_workers)
+    
+    # Save to a scratch directory and rename it into place, so readers never see a partial cache entry
+    os.makedirs(cache_dir, exist_ok=True)
+    scratch_dir = tempfile.mkdtemp(dir=cache_dir, prefix='.tmp-')
+    try:
+        dataset.save(scratch_dir)
+        os.rename(scratch_dir, directory)
+    except OSError:
+        # Another process cached the same dataset first
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+    
+    return dataset
@@ -1,39 +1,229 @@
 import requests
 import os
 import zstandard as zstd
-import chess.pgn
 import io
 from tqdm import tqdm
 import argparse
 from datetime import datetime, timedelta
 import glob
 import sys
-import humanize
+import re
+import mmap
+import multiprocessing
+from collections import deque
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-def download_file(url, output_path, chunk_size=8192):
-    """Download a file with progress bar."""
+# Parallel download settings: connections, bytes per range request and per read within a range
+DOWNLOAD_CONNECTIONS = 8
+RANGE_CHUNK_BYTES = 16 * 1024 * 1024
+RANGE_READ_BYTES = 1024 * 1024
+
+# Every game starts with an Event tag on a fresh line
+GAME_SEPARATOR = b'\n[Event '
+
+# Both rating tags of a game header, matched in a single pass
+ELO_RE = re.compile(rb'\[(White|Black)Elo "(\d+)"\]')
+
+# Lichess writes the two rating tags on consecutive lines, which a single search can match
+ELO_PAIR_RE = re.compile(rb'\[WhiteElo "(\d+)"\]\r?\n\[BlackElo "(\d+)"\]')
+
+# Number of games between progress bar updates in process_games
+PROGRESS_INTERVAL_GAMES = 256
+
+# Size of the reads the game scanner pulls from its input stream
+SCAN_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Kept games are collected and handed to writelines once they add up to this many bytes
+WRITE_BATCH_BYTES = 1024 * 1024
+
+# Bytes scanned at the start of a decompressed dump to estimate the average game size
+ESTIMATE_WINDOW_BYTES = 4 * 1024 * 1024
+
+# zstd frame magic numbers (little-endian); skippable frames use 16 magics sharing the top 28 bits
+ZSTD_FRAME_MAGIC = 0xFD2FB528
+ZSTD_SKIPPABLE_MAGIC = 0x184D2A50
+
+# Approximate compressed bytes of consecutive frames decompressed and filtered by one worker task
+FRAME_GROUP_BYTES = 16 * 1024 * 1024
+
+# Bytes decompressed per read when writing a database to disk
+DECOMPRESS_READ_BYTES = 16 * 1024 * 1024
+
+# Target size of the byte ranges a plain PGN file is split into for parallel filtering
+FILTER_RANGE_BYTES = 16 * 1024 * 1024
+
+def format_size(num_bytes):
+    """Format a byte count with binary units, e.g. 1.5 GiB."""
+    for unit in ('B', 'KiB', 'MiB', 'GiB', 'TiB'):
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} PiB"
+
+def format_duration(delta):
+    """Format a timedelta as e.g. 1h 02m 03s."""
+    seconds = int(delta.total_seconds())
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m {seconds:02d}s"
+    if minutes:
+        return f"{minutes}m {seconds:02d}s"
+    return f"{seconds}s"
+
+def iter_raw_games(infile, chunk_size=SCAN_CHUNK_SIZE):
+    """
+    Split a binary PGN stream into the raw bytes of each game.
+    
+    Games are cut at the '[Event ' tag that starts the next game, so each
+    slab keeps its original text, including the blank lines after it.
+    
+    Args:
+        infile: Binary stream of PGN games (an open file or a decompressing stream)
+        chunk_size: Number of bytes read from infile at a time
+        
+    Yields:
+        bytearray holding one game
+    """
+    buffer = bytearray()
+    while True:
+        chunk = infile.read(chunk_size)
+        if not chunk:
+            break
+        
+        # Resume the search just before the new data so a separator split across reads is found
+        search_from = max(len(buffer) - len(GAME_SEPARATOR), 0)
+        buffer += chunk
+        
+        start = 0
+        end = buffer.find(GAME_SEPARATOR, max(search_from, 1))
+        while end != -1:
+            # Slicing the bytearray is the only copy a game goes through before it is written
+            yield buffer[start:end + 1]
+            start = end + 1
+            end = buffer.find(GAME_SEPARATOR, start)
+        del buffer[:start]
+    
+    if buffer.strip():
+        yield buffer
+
+def _download_range(session, url, fd, start, end, progress, lock):
+    """Download bytes [start, end) of url into the same offsets of an open file descriptor."""
+    headers = {'Range': f'bytes={start}-{end - 1}'}
+    with session.get(url, headers=headers, stream=True, timeout=60) as response:
+        if response.status_code != 206:
+            raise RuntimeError(f"Range request returned status code {response.status_code}")
+        
+        offset = start
+        for data in response.iter_content(chunk_size=RANGE_READ_BYTES):
+            os.pwrite(fd, data, offset)
+            offset += len(data)
+            with lock:
+                progress.update(len(data))
+    
+    if offset != end:
+        raise RuntimeError(f"Range {start}-{end - 1} ended early at byte {offset}")
+
+def download_file(url, output_path, chunk_size=8192, num_connections=DOWNLOAD_CONNECTIONS):
+    """
+    Download a file with progress bar.
+    
+    When the server accepts range requests, the file is split into
+    RANGE_CHUNK_BYTES pieces fetched over num_connections parallel
+    connections and written straight into their offsets of the output file,
+    so the download is not limited to a single TCP connection's throughput.
+    """
     try:
         print(f"\n>>> Attempting to download from: {url}")
         
-        # First check if the file exists on the server
-        response = requests.head(url)
+        session = requests.Session()
+        # The dumps are already zstd-compressed; don't let the server wrap them in gzip
+        session.headers['Accept-Encoding'] = 'identity'
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=num_connections)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        
+        # The status of the streaming GET tells whether the file exists, without a HEAD round trip
+        response = session.get(url, stream=True, timeout=30)
         if response.status_code == 404:
             print(f"[ERROR] File not found on server (404 error)")
+            response.close()
             return False
         elif response.status_code != 200:
             print(f"[ERROR] Server returned status code: {response.status_code}")
+            response.close()
             return False
         
-        # File exists, proceed with download
+        total_size = int(response.headers.get('content-length', 0))
+        accepts_ranges = response.headers.get('accept-ranges', '').lower() == 'bytes'
+        # Ranges are written with os.pwrite, which only exists on POSIX
+        if (not accepts_ranges or total_size <= RANGE_CHUNK_BYTES or num_connections < 2
+                or not hasattr(os, 'pwrite')):
+            return download_file_single(url, output_path, chunk_size, response=response)
+        
+        # The body is fetched in ranges instead
+        response.close()
+        print(f"[OK] File found! Starting download over {num_connections} connections...")
+        print(f"[INFO] File size: {format_size(total_size)}")
+        
+        progress_bar = tqdm(
+            total=total_size,
+            unit='iB',
+            unit_scale=True,
+            desc="Downloading",
+            bar_format='{desc}: {percentage:3.1f}%|{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}]'
+        )
+        lock = threading.Lock()
+        
+        with open(output_path, 'wb') as f:
+            # Preallocate so every range can be written at its final offset
+            f.truncate(total_size)
+            with ThreadPoolExecutor(max_workers=num_connections) as executor:
+                futures = [
+                    executor.submit(_download_range, session, url, f.fileno(), start,
+                                    min(start + RANGE_CHUNK_BYTES, total_size), progress_bar, lock)
+                    for start in range(0, total_size, RANGE_CHUNK_BYTES)
+                ]
+                try:
+                    for future in futures:
+                        future.result()
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
+        
+        progress_bar.close()
+        print(f"[OK] Download completed successfully: {output_path}")
+        return True
+        
+    except Exception as e:
+        print(f"[ERROR] Error downloading file: {str(e)}")
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        return False
+
+def download_file_single(url, output_path, chunk_size=8192, response=None):
+    """
+    Download a file with progress bar over a single streaming connection.
+    
+    Args:
+        url: URL of the file
+        output_path: Path to write the file to
+        chunk_size: Number of bytes read from the response at a time
+        response: Already opened streaming GET response for url to read the body from (optional)
+    """
+    try:
         print(f"[OK] File found! Starting download...")
-        response = requests.get(url, stream=True)
+        if response is None:
+            response = requests.get(url, stream=True, headers={'Accept-Encoding': 'identity'})
         total_size = int(response.headers.get('content-length', 0))
         
         if total_size == 0:
             print("[WARN] Warning: Content length is 0, file might be empty")
             return False
         
-        print(f"[INFO] File size: {humanize.naturalsize(total_size, binary=True)}")
+        print(f"[INFO] File size: {format_size(total_size)}")
         progress_bar = tqdm(
             total=total_size,
             unit='iB',
@@ -51,7 +241,7 @@ def download_file(url, output_path, chunk_size=8192):
         
         # Verify file was downloaded correctly
         if os.path.getsize(output_path) != total_size:
-            print(f"[ERROR] Downloaded file size ({humanize.naturalsize(os.path.getsize(output_path), binary=True)}) doesn't match expected size ({humanize.naturalsize(total_size, binary=True)})")
+            print(f"[ERROR] Downloaded file size ({format_size(os.path.getsize(output_path))}) doesn't match expected size ({format_size(total_size)})")
             os.remove(output_path)
             return False
         
@@ -64,68 +254,89 @@ def download_file(url, output_path, chunk_size=8192):
             os.remove(output_path)
         return False
 
-def process_games(input_file, output_file, min_elo=2000, max_games=None):
-    """Process games from a PGN file, filtering by Elo rating."""
+def is_rated_game(game, min_elo):
+    """Check whether both players of a raw PGN game are rated at least min_elo."""
+    match = ELO_PAIR_RE.search(game)
+    if match:
+        return int(match[1]) >= min_elo and int(match[2]) >= min_elo
+    
+    # Other tag orders: games with a missing or unknown ("?") rating never match and are skipped
+    header_end = game.find(b'\n\n')
+    elos = dict(ELO_RE.findall(game, 0, header_end if header_end != -1 else len(game)))
+    return int(elos.get(b'White', 0)) >= min_elo and int(elos.get(b'Black', 0)) >= min_elo
+
+def process_games(infile, output_file, min_elo=2000, max_games=None, total_size=None, tell=None):
+    """
+    Process games from a binary PGN stream, filtering by Elo rating.
+    
+    Only the rating tags of each header are read; kept games are copied to
+    output_file byte for byte, without building or re-serializing a Game.
+    
+    Args:
+        infile: Binary stream of PGN games (an open file or a decompressing stream)
+        output_file: Path of the filtered PGN file to write
+        min_elo: Minimum Elo rating both players must have
+        max_games: Stop after keeping this many games (optional)
+        total_size: Total number of bytes the progress bar counts up to
+        tell: Callable returning the number of bytes consumed so far, for the
+            progress bar (defaults to infile.tell; pass the compressed file's
+            tell when reading through a decompressor)
+    """
     print(f"\n[INFO] Processing games (min Elo: {min_elo})...")
     games_processed = 0
     games_kept = 0
     start_time = datetime.now()
     buffer_size = 1024 * 1024  # 1MB buffer
+    tell = tell or infile.tell
+    batch = []
+    batch_bytes = 0
     
     try:
-        total_size = os.path.getsize(input_file)
-        
-        with open(output_file, 'w', buffering=buffer_size) as outfile:
-            with open(input_file, buffering=buffer_size) as infile:
-                pbar = tqdm(
-                    total=total_size,
-                    unit='B',
-                    unit_scale=True,
-                    desc="Processing games",
-                    bar_format='{desc}: {percentage:3.1f}%|{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]',
-                    mininterval=1.0
-                )
+        with open(output_file, 'wb', buffering=buffer_size) as outfile:
+            pbar = tqdm(
+                total=total_size,
+                unit='B',
+                unit_scale=True,
+                desc="Processing games",
+                bar_format='{desc}: {percentage:3.1f}%|{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]',
+                mininterval=1.0
+            )
+            
+            current_pos = tell()
+            for game in iter_raw_games(infile):
+                games_processed += 1
                 
-                game_reader = chess.pgn.read_game
+                # Input is consumed in large reads, so the position only moves every few hundred games
+                if games_processed % PROGRESS_INTERVAL_GAMES == 0:
+                    new_pos = tell()
+                    pbar.update(new_pos - current_pos)
+                    current_pos = new_pos
                 
-                while True:
-                    try:
-                        current_pos = infile.tell()
-                        game = game_reader(infile)
-                        if game is None:
-                            break
-                        
-                        games_processed += 1
-                        new_pos = infile.tell()
-                        pbar.update(new_pos - current_pos)
-                        
-                        headers = game.headers
-                        try:
-                            white_elo = int(headers.get("WhiteElo", "0"))
-                            black_elo = int(headers.get("BlackElo", "0"))
-                            
-                            if white_elo >= min_elo and black_elo >= min_elo:
-                                print(game, file=outfile, end="\n\n", flush=False)
-                                games_kept += 1
-                                
-                                if max_games and games_kept >= max_games:
-                                    break
-                        except ValueError:
-                            continue
-                        
-                        if games_processed % 5000 == 0:
-                            elapsed = datetime.now() - start_time
-                            rate = games_processed / elapsed.total_seconds()
-                            pbar.set_postfix({
-                                'Games': f'{games_processed:,}',
-                                'Kept': f'{games_kept:,}',
-                                'Rate': f'{rate:.1f} games/s'
-                            }, refresh=True)
-                    except Exception as e:
-                        print(f"\n[WARN] Error processing game: {e}")
-                        continue
+                if is_rated_game(game, min_elo):
+                    batch.append(game)
+                    batch_bytes += len(game)
+                    games_kept += 1
+                    
+                    if batch_bytes >= WRITE_BATCH_BYTES:
+                        outfile.writelines(batch)
+                        batch.clear()
+                        batch_bytes = 0
+                    
+                    if max_games and games_kept >= max_games:
+                        break
                 
-                pbar.close()
+                if games_processed % 5000 == 0:
+                    elapsed = datetime.now() - start_time
+                    rate = games_processed / elapsed.total_seconds()
+                    pbar.set_postfix({
+                        'Games': f'{games_processed:,}',
+                        'Kept': f'{games_kept:,}',
+                        'Rate': f'{rate:.1f} games/s'
+                    }, refresh=True)
+            
+            outfile.writelines(batch)
+            pbar.update(tell() - current_pos)
+            pbar.close()
         
         elapsed = datetime.now() - start_time
         rate = games_processed / elapsed.total_seconds()
@@ -135,7 +346,7 @@ def process_games(input_file, output_file, min_elo=2000, max_games=None):
         print(f"[INFO] Statistics:")
         print(f"  * Total games processed: {games_processed:,}")
         print(f"  * Games kept: {games_kept:,} ({kept_ratio:.1f}%)")
-        print(f"  * Processing time: {humanize.naturaldelta(elapsed)}")
+        print(f"  * Processing time: {format_duration(elapsed)}")
         print(f"  * Processing rate: {rate:.1f} games/s")
         
         return games_kept > 0
@@ -143,24 +354,298 @@ def process_games(input_file, output_file, min_elo=2000, max_games=None):
         print(f"\n[ERROR] Error during processing: {str(e)}")
         return False
 
-def estimate_bytes_for_games(file_path, num_games=10000):
-    """Estimate the file size needed for the specified number of games."""
+def process_compressed_games(compressed_path, output_file, min_elo=2000, max_games=None):
+    """Filter games straight out of a .pgn.zst file without writing the decompressed PGN to disk."""
+    # Unbuffered file: the decompressor already pulls large reads, so an extra buffer would only copy
+    with open(compressed_path, 'rb', buffering=0) as compressed:
+        dctx = zstd.ZstdDecompressor()
+        with dctx.stream_reader(compressed, read_size=SCAN_CHUNK_SIZE) as reader:
+            # Progress follows the compressed bytes consumed, since the decompressed size is unknown
+            return process_games(
+                reader, output_file, min_elo, max_games,
+                total_size=os.path.getsize(compressed_path),
+                tell=compressed.tell
+            )
+
+def find_zstd_frames(data):
+    """
+    Locate the frames of a zstd file by walking the frame and block headers.
+    
+    No data is decompressed: each block header stores its own size, so a frame
+    ends after the block flagged as last (plus the optional checksum).
+    Skippable frames are stepped over.
+    
+    Args:
+        data: Buffer holding the whole compressed file (e.g. an mmap)
+        
+    Returns:
+        list of (start, end) byte offsets, one per frame
+    """
+    frames = []
+    pos = 0
+    while pos < len(data):
+        start = pos
+        magic = int.from_bytes(data[pos:pos + 4], 'little')
+        if magic & 0xFFFFFFF0 == ZSTD_SKIPPABLE_MAGIC:
+            pos += 8 + int.from_bytes(data[pos + 4:pos + 8], 'little')
+            continue
+        if magic != ZSTD_FRAME_MAGIC:
+            raise ValueError(f"Invalid zstd frame at byte {pos}")
+        
+        has_checksum = data[pos + 4] & 0x04
+        pos += zstd.frame_header_size(data[pos:pos + 18])
+        while True:
+            block_header = int.from_bytes(data[pos:pos + 3], 'little')
+            block_type = (block_header >> 1) & 0x03
+            pos += 3 + (1 if block_type == 1 else block_header >> 3)  # RLE blocks store a single byte
+            if block_header & 0x01:
+                break
+        if has_checksum:
+            pos += 4
+        frames.append((start, pos))
+    
+    return frames
+
+def filter_frames(compressed_path, start, end, min_elo):
+    """
+    Decompress a run of whole zstd frames and filter the games inside. Runs in a worker process.
+    
+    Frames are not aligned with games, so the text before the first game
+    header and the last (possibly cut) game are returned unfiltered, to be
+    joined with the neighbouring runs by the caller.
+    
+    Returns:
+        tuple (head, kept_games, num_games, tail) where kept_games is a list of
+        raw games passing the filter, num_games counts all complete games and
+        tail is None when no game starts in the run
+    """
+    with open(compressed_path, 'rb') as f:
+        f.seek(start)
+        compressed = f.read(end - start)
+    dctx = zstd.ZstdDecompressor()
+    data = dctx.stream_reader(io.BytesIO(compressed), read_across_frames=True).read()
+    
+    if data.startswith(b'[Event '):
+        first = 0
+    else:
+        first = data.find(GAME_SEPARATOR) + 1
+        if first == 0:
+            # No game starts in this run: it is all the middle of one game
+            return data, [], 0, None
+    last = max(data.rfind(GAME_SEPARATOR) + 1, first)
+    
+    games = list(iter_raw_games(io.BytesIO(data[first:last])))
+    kept_games = [game for game in games if is_rated_game(game, min_elo)]
+    return data[:first], kept_games, len(games), data[last:]
+
+def parallel_process_compressed_games(compressed_path, output_file, min_elo=2000, max_games=None, num_workers=None):
+    """
+    Filter a multi-frame .pgn.zst file with one process per CPU core.
+    
+    Lichess dumps consist of many independent zstd frames, so runs of frames
+    are decompressed and filtered in parallel and the results are written in
+    file order. Falls back to process_compressed_games for single-frame files.
+    """
+    num_workers = num_workers or os.cpu_count()
+    if os.path.getsize(compressed_path) == 0:
+        frames = []  # mmap can't map an empty file; the serial path reports it
+    else:
+        with open(compressed_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            frames = find_zstd_frames(mm)
+    
+    # Group consecutive frames into tasks of roughly FRAME_GROUP_BYTES
+    groups = []
+    for start, end in frames:
+        if groups and end - groups[-1][0] <= FRAME_GROUP_BYTES:
+            groups[-1] = (groups[-1][0], end)
+        else:
+            groups.append((start, end))
+    
+    if len(groups) < 2 or num_workers < 2:
+        return process_compressed_games(compressed_path, output_file, min_elo, max_games)
+    
+    print(f"\n[INFO] Processing games (min Elo: {min_elo}) from {len(frames):,} frames with {num_workers} processes...")
+    games_processed = 0
+    games_kept = 0
+    start_time = datetime.now()
+    
+    def write_games(games):
+        nonlocal games_kept
+        if max_games:
+            games = games[:max_games - games_kept]
+        outfile.writelines(games)
+        games_kept += len(games)
+    
     try:
-        total_size = os.path.getsize(file_path)
+        mp_context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=num_workers, mp_context=mp_context) as executor, \
+             open(output_file, 'wb', buffering=1024 * 1024) as outfile, \
+             tqdm(total=os.path.getsize(compressed_path), unit='B', unit_scale=True, desc="Processing games",
+                  bar_format='{desc}: {percentage:3.1f}%|{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]') as pbar:
+            # Keep a bounded number of runs in flight so decompressed data never piles up in memory
+            pending = deque()
+            groups = iter(groups)
+            carry = b''
+            while True:
+                for start, end in groups:
+                    pending.append((executor.submit(filter_frames, compressed_path, start, end, min_elo), end - start))
+                    if len(pending) >= 2 * num_workers:
+                        break
+                if not pending:
+                    break
+                
+                future, num_bytes = pending.popleft()
+                head, kept, num_games, tail = future.result()
+                
+                # The tail of the previous run and the head of this one form complete games
+                carry += head
+                if tail is not None:
+                    stitched = list(iter_raw_games(io.BytesIO(carry)))
+                    games_processed += len(stitched)
+                    write_games([game for game in stitched if is_rated_game(game, min_elo)])
+                    carry = tail
+                write_games(kept)
+                games_processed += num_games
+                pbar.update(num_bytes)
+                
+                if max_games and games_kept >= max_games:
+                    break
+            
+            if carry and not (max_games and games_kept >= max_games):
+                stitched = list(iter_raw_games(io.BytesIO(carry)))
+                games_processed += len(stitched)
+                write_games([game for game in stitched if is_rated_game(game, min_elo)])
+            
+            executor.shutdown(cancel_futures=True)
+        
+        elapsed = datetime.now() - start_time
+        rate = games_processed / elapsed.total_seconds()
+        kept_ratio = (games_kept / games_processed * 100) if games_processed > 0 else 0
         
-        # Sample the first 1000 games to get average game size
-        games_read = 0
-        bytes_read = 0
+        print(f"\n[OK] Processing complete:")
+        print(f"[INFO] Statistics:")
+        print(f"  * Total games processed: {games_processed:,}")
+        print(f"  * Games kept: {games_kept:,} ({kept_ratio:.1f}%)")
+        print(f"  * Processing time: {format_duration(elapsed)}")
+        print(f"  * Processing rate: {rate:.1f} games/s")
         
-        with open(file_path) as f:
-            while games_read < 1000:
-                start_pos = f.tell()
-                game = chess.pgn.read_game(f)
-                if game is None:
+        return games_kept > 0
+    except Exception as e:
+        print(f"\n[ERROR] Error during processing: {str(e)}")
+        return False
+
+def find_game_ranges(input_file, range_bytes=FILTER_RANGE_BYTES):
+    """
+    Split a plain PGN file into byte ranges of roughly range_bytes that start on game boundaries.
+    
+    Returns:
+        list of (start, end) byte offsets covering the whole file (empty for an empty file)
+    """
+    if os.path.getsize(input_file) == 0:
+        return []  # mmap can't map an empty file
+    with open(input_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        file_size = len(mm)
+        boundaries = [0]
+        while True:
+            # Snap each cut forward to the '[Event ' tag of the next game
+            cut = mm.find(GAME_SEPARATOR, boundaries[-1] + range_bytes - 1)
+            if cut == -1:
+                break
+            boundaries.append(cut + 1)
+    boundaries.append(file_size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+def filter_range(input_file, start, end, min_elo):
+    """
+    Filter the games in bytes [start, end) of a plain PGN file. Runs in a worker process.
+    
+    Returns:
+        tuple (kept_games, num_games) where kept_games is a list of raw games passing the filter
+    """
+    with open(input_file, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    games = list(iter_raw_games(io.BytesIO(data)))
+    return [game for game in games if is_rated_game(game, min_elo)], len(games)
+
+def parallel_process_games(input_file, output_file, min_elo=2000, max_games=None, num_workers=None,
+                           range_bytes=FILTER_RANGE_BYTES):
+    """
+    Filter a plain PGN file with one process per CPU core.
+    
+    The file is cut into ranges of roughly range_bytes on game boundaries, so
+    each range is filtered independently and the results are written in file order.
+    """
+    num_workers = num_workers or os.cpu_count()
+    ranges = find_game_ranges(input_file, range_bytes=range_bytes)
+    
+    if len(ranges) < 2 or num_workers < 2:
+        with open(input_file, 'rb', buffering=0) as infile:  # Read in SCAN_CHUNK_SIZE blocks
+            return process_games(infile, output_file, min_elo, max_games,
+                                 total_size=os.path.getsize(input_file))
+    
+    print(f"\n[INFO] Processing games (min Elo: {min_elo}) from {len(ranges):,} ranges with {num_workers} processes...")
+    games_processed = 0
+    games_kept = 0
+    start_time = datetime.now()
+    
+    try:
+        mp_context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=num_workers, mp_context=mp_context) as executor, \
+             open(output_file, 'wb', buffering=1024 * 1024) as outfile, \
+             tqdm(total=os.path.getsize(input_file), unit='B', unit_scale=True, desc="Processing games",
+                  bar_format='{desc}: {percentage:3.1f}%|{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]') as pbar:
+            # Keep a bounded number of ranges in flight so kept games never pile up in memory
+            pending = deque()
+            ranges = iter(ranges)
+            while True:
+                for start, end in ranges:
+                    pending.append((executor.submit(filter_range, input_file, start, end, min_elo), end - start))
+                    if len(pending) >= 2 * num_workers:
+                        break
+                if not pending:
+                    break
+                
+                future, num_bytes = pending.popleft()
+                kept, num_games = future.result()
+                if max_games:
+                    kept = kept[:max_games - games_kept]
+                outfile.writelines(kept)
+                games_kept += len(kept)
+                games_processed += num_games
+                pbar.update(num_bytes)
+                
+                if max_games and games_kept >= max_games:
                     break
-                end_pos = f.tell()
-                bytes_read += (end_pos - start_pos)
-                games_read += 1
+            
+            executor.shutdown(cancel_futures=True)
+        
+        elapsed = datetime.now() - start_time
+        rate = games_processed / elapsed.total_seconds()
+        kept_ratio = (games_kept / games_processed * 100) if games_processed > 0 else 0
+        
+        print(f"\n[OK] Processing complete:")
+        print(f"[INFO] Statistics:")
+        print(f"  * Total games processed: {games_processed:,}")
+        print(f"  * Games kept: {games_kept:,} ({kept_ratio:.1f}%)")
+        print(f"  * Processing time: {format_duration(elapsed)}")
+        print(f"  * Processing rate: {rate:.1f} games/s")
+        
+        return games_kept > 0
+    except Exception as e:
+        print(f"\n[ERROR] Error during processing: {str(e)}")
+        return False
+
+def estimate_bytes_for_games(file_path, num_games=10000):
+    """Estimate the file size needed for the specified number of games."""
+    # Outside the try: a missing file is an error for the caller, and the fallback below needs the size
+    total_size = os.path.getsize(file_path)
+    try:
+        # Measure the average game size from the game boundaries in the first few MB
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            window = mm[:ESTIMATE_WINDOW_BYTES]
+        games_read = window.count(GAME_SEPARATOR)
+        bytes_read = window.rfind(GAME_SEPARATOR) + 1  # Up to the start of the last (possibly cut) game
         
         if games_read == 0:
             return total_size
@@ -174,14 +659,64 @@ def estimate_bytes_for_games(file_path, num_games=10000):
         print(f"[WARN] Error estimating file size: {e}")
         return total_size
 
-def truncate_file(input_path, output_path, max_size):
-    """Copy the first max_size bytes from input to output."""
+def decompress_to_disk(compressed_path, raw_path, max_games=None):
+    """Decompress the database to raw_path, truncating it to roughly max_games games."""
+    print("\n[INFO] Decompressing database...")
     try:
-        with open(input_path, 'rb') as infile, open(output_path, 'wb') as outfile:
-            outfile.write(infile.read(max_size))
+        with open(compressed_path, 'rb') as compressed, \
+             mmap.mmap(compressed.fileno(), 0, access=mmap.ACCESS_READ) as mm_in:
+            # Frame headers normally record their decompressed size, which gives the output size up front
+            content_sizes = [zstd.get_frame_parameters(mm_in[start:min(start + 18, end)]).content_size
+                             for start, end in find_zstd_frames(mm_in)]
+            raw_size = None if zstd.CONTENTSIZE_UNKNOWN in content_sizes else sum(content_sizes)
+            
+            reader = zstd.ZstdDecompressor().stream_reader(mm_in, read_across_frames=True)
+            with open(raw_path, 'wb+') as raw, tqdm(
+                total=raw_size,
+                unit='B',
+                unit_scale=True,
+                desc="Decompressing",
+                bar_format='{desc}: {percentage:3.1f}%|{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]'
+            ) as pbar:
+                if raw_size:
+                    # Decompress straight into a preallocated mapping of the output file
+                    raw.truncate(raw_size)
+                    with mmap.mmap(raw.fileno(), raw_size) as mm_out, memoryview(mm_out) as view:
+                        pos = 0
+                        while pos < raw_size:
+                            size = reader.readinto(view[pos:pos + DECOMPRESS_READ_BYTES])
+                            if size == 0:
+                                raise ValueError(f"Stream ended at {pos:,} of {raw_size:,} bytes")
+                            pos += size
+                            pbar.update(size)
+                else:
+                    while True:
+                        data = reader.read(DECOMPRESS_READ_BYTES)
+                        if not data:
+                            break
+                        raw.write(data)
+                        pbar.update(len(data))
+        print("[OK] Decompression completed")
+        
+        if max_games:
+            print(f"\n[INFO] Truncating file to approximately {max_games:,} games...")
+            estimated_size = estimate_bytes_for_games(raw_path, max_games)
+            print(f"[INFO] Estimated size needed: {format_size(estimated_size)}")
+            
+            if estimated_size < os.path.getsize(raw_path):
+                # Cut at the start of the game the estimate lands in, so no partial game is left at the end
+                with open(raw_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    cut = mm.rfind(GAME_SEPARATOR, 0, estimated_size + len(GAME_SEPARATOR) - 1) + 1
+                if cut > 0:
+                    # Shrink the file in place instead of copying the kept part to a new file
+                    os.truncate(raw_path, cut)
+                    print(f"[OK] File truncated in place to {format_size(cut)}")
+        
         return True
     except Exception as e:
-        print(f"[ERROR] Error truncating file: {e}")
+        print(f"[ERROR] Error decompressing database: {e}")
+        if os.path.exists(raw_path):
+            os.remove(raw_path)
         return False
 
 def main():
@@ -196,6 +731,12 @@ def main():
                         help='Minimum Elo rating for games')
     parser.add_argument('--max-games', type=int, default=None,
                         help='Maximum number of games to keep')
+    parser.add_argument('--input-file', type=str,
+                        help='Filter an existing .pgn or .pgn.zst file instead of downloading one')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of processes used to decompress and filter games (defaults to CPU count)')
+    parser.add_argument('--keep-raw', action='store_true',
+                        help='Decompress the database to disk before filtering and keep it (for debugging)')
     args = parser.parse_args()
     
     print("\n=== Lichess Game Downloader and Processor ===")
@@ -236,68 +777,39 @@ def main():
                 print("[ERROR] Failed to download database")
                 return
         
-        # Decompress the database
-        print("\n[INFO] Decompressing database...")
-        try:
-            total_size = os.path.getsize(compressed_path)
-            with open(compressed_path, 'rb') as compressed:
-                dctx = zstd.ZstdDecompressor()
-                with open(raw_path, 'wb') as raw, tqdm(
-                    total=total_size,
-                    unit='B',
-                    unit_scale=True,
-                    desc="Decompressing",
-                    bar_format='{desc}: {percentage:3.1f}%|{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]'
-                ) as pbar:
-                    # Create a write callback to update the progress bar
-                    class CallbackWriter:
-                        def __init__(self, file_obj, progress):
-                            self.file_obj = file_obj
-                            self.progress = progress
-                            self.total_written = 0
-
-                        def write(self, data):
-                            self.file_obj.write(data)
-                            self.total_written += len(data)
-                            self.progress.update(len(data))
-                            return len(data)
-
-                    writer = CallbackWriter(raw, pbar)
-                    dctx.copy_stream(compressed, writer)
-            print("[OK] Decompression completed")
-            
-            if args.max_games:
-                print(f"\n[INFO] Truncating file to approximately {args.max_games:,} games...")
-                # Create a temporary file for the truncated data
-                truncated_path = raw_path + '.truncated'
-                estimated_size = estimate_bytes_for_games(raw_path, args.max_games)
-                print(f"[INFO] Estimated size needed: {humanize.naturalsize(estimated_size, binary=True)}")
-                
-                if truncate_file(raw_path, truncated_path, estimated_size):
-                    # Replace original file with truncated version
-                    os.remove(raw_path)
-                    os.rename(truncated_path, raw_path)
-                    print(f"[OK] File truncated successfully")
-                else:
-                    print(f"[WARN] Failed to truncate file, will process entire file")
-            
-        except Exception as e:
-            print(f"[ERROR] Error decompressing database: {e}")
-            if os.path.exists(raw_path):
-                os.remove(raw_path)
-            return
+        if args.keep_raw:
+            # Debugging path: keep the decompressed database on disk before filtering it
+            if not decompress_to_disk(compressed_path, raw_path, args.max_games):
+                return
+            kept = parallel_process_games(raw_path, filtered_path, args.min_elo, args.max_games, args.workers)
+        else:
+            # Decompress and filter in a single pass, spread over the frames of the dump
+            kept = parallel_process_compressed_games(compressed_path, filtered_path, args.min_elo,
+                                                     args.max_games, args.workers)
         
-        # Process and filter games
-        if not process_games(raw_path, filtered_path, args.min_elo, args.max_games):
+        if not kept:
             print("[ERROR] No games met the filtering criteria")
             return
         
         # Clean up temporary files
         print("\n[INFO] Cleaning up temporary files...")
         os.remove(compressed_path)
-        os.remove(raw_path)
+        if args.keep_raw:
+            print(f"[INFO] Keeping decompressed database: {raw_path}")
         print("[OK] Cleanup completed")
         
+    elif args.input_file:
+        if args.input_file.endswith('.zst'):
+            kept = parallel_process_compressed_games(args.input_file, filtered_path, args.min_elo,
+                                                     args.max_games, args.workers)
+        else:
+            kept = parallel_process_games(args.input_file, filtered_path, args.min_elo,
+                                          args.max_games, args.workers)
+        
+        if not kept:
+            print("[ERROR] No games met the filtering criteria")
+            return
+        
     else:
         print("\n[ERROR] No .pgn.zst file found. You can:")
         print("1. Use --download to download the latest database")
@@ -3,6 +3,10 @@ import requests
 from pathlib import Path
 from PIL import Image
 import io
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from config import PIECE_ATLAS_FILENAME, PIECE_ATLAS_ROWS
 
 # Create pieces directory if it doesn't exist
 pieces_dir = Path("pieces")
@@ -26,6 +30,83 @@ PIECE_INFO = {
     'p': {'url': 'https://images.chesscomfiles.com/chess-themes/pieces/neo/150/bp.png', 'filename': 'PAWN_BLACK.png'},
 }
 
+# Side of the square each piece image is resized to, and of its atlas cell
+PIECE_SIZE = 80
+
+def build_piece_atlas():
+    """
+    Pack the twelve piece images into one atlas image.
+    
+    Loading one PNG at startup costs a single open and decode instead of twelve.
+    
+    Returns:
+        Path of the atlas image
+    """
+    atlas = Image.new('RGBA', (len(PIECE_ATLAS_ROWS[0]) * PIECE_SIZE, len(PIECE_ATLAS_ROWS) * PIECE_SIZE), (0, 0, 0, 0))
+    for row, pieces in enumerate(PIECE_ATLAS_ROWS):
+        for col, piece in enumerate(pieces):
+            with Image.open(pieces_dir / PIECE_INFO[piece]['filename']) as img:
+                atlas.paste(img.convert('RGBA'), (col * PIECE_SIZE, row * PIECE_SIZE))
+    output_path = pieces_dir / PIECE_ATLAS_FILENAME
+    atlas.save(output_path, 'PNG', compress_level=1)
+    return output_path
+
+def _fetch_and_process(session, piece_info):
+    """
+    Download one piece image, resize it and save it to the pieces directory.
+    
+    Runs on a worker thread, so progress messages are collected and returned
+    instead of printed, keeping each piece's output together.
+    
+    Returns:
+        list of log lines
+    """
+    url = piece_info['url']
+    filename = piece_info['filename']
+    output_path = pieces_dir / filename
+    log = [f"\nProcessing {filename}:", f"URL: {url}", f"Output path: {output_path}"]
+    
+    try:
+        # Download PNG with proper headers
+        log.append(f"Downloading {filename}...")
+        response = session.get(url)
+        log.append(f"Response status code: {response.status_code}")
+        
+        if response.status_code == 200:
+            # Try to open and process the image
+            img = Image.open(io.BytesIO(response.content))
+            log.append(f"Image mode: {img.mode}, Size: {img.size}")
+            
+            # Ensure image has alpha channel
+            if img.mode != 'RGBA':
+                log.append(f"Converting {img.mode} to RGBA")
+                img = img.convert('RGBA')
+            
+            if img.width == img.height:
+                # Square sources (all of chess.com's) need a single resize and no canvas
+                new_img = img.resize((PIECE_SIZE, PIECE_SIZE), Image.Resampling.LANCZOS)
+            else:
+                # Resize while maintaining aspect ratio
+                img.thumbnail((PIECE_SIZE, PIECE_SIZE), Image.Resampling.LANCZOS)
+                
+                # Paste resized image in center of a transparent canvas
+                new_img = Image.new('RGBA', (PIECE_SIZE, PIECE_SIZE), (0, 0, 0, 0))
+                x = (PIECE_SIZE - img.width) // 2
+                y = (PIECE_SIZE - img.height) // 2
+                new_img.paste(img, (x, y), img)
+            log.append(f"Resized to: {new_img.size}")
+            
+            # Save with transparency; these are one-off assets, so skip the slow deflate search
+            new_img.save(output_path, 'PNG', compress_level=1)
+            log.append(f"Successfully saved {filename}")
+        else:
+            log.append(f"Failed to download {filename} (Status code: {response.status_code})")
+    except Exception as e:
+        log.append(f"Error processing {filename}: {str(e)}")
+        log.append(traceback.format_exc())
+    
+    return log
+
 def download_piece_images():
     # Set up headers for the request
     headers = {
@@ -38,6 +119,7 @@ def download_piece_images():
     print("Downloading chess piece images...")
     session = requests.Session()
     session.headers.update(headers)
+    session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=len(PIECE_INFO)))
     
     # First, verify all existing files
     existing_files = []
@@ -51,53 +133,14 @@ def download_piece_images():
         print("Deleting existing files to ensure fresh download...")
         for filename in existing_files:
             (pieces_dir / filename).unlink()
+    # The atlas is rebuilt from the new files, or left out if any is missing
+    if (pieces_dir / PIECE_ATLAS_FILENAME).exists():
+        (pieces_dir / PIECE_ATLAS_FILENAME).unlink()
     
-    for piece_symbol, piece_info in PIECE_INFO.items():
-        url = piece_info['url']
-        filename = piece_info['filename']
-        output_path = pieces_dir / filename
-        
-        print(f"\nProcessing {filename}:")
-        print(f"URL: {url}")
-        print(f"Output path: {output_path}")
-        
-        try:
-            # Download PNG with proper headers
-            print(f"Downloading {filename}...")
-            response = session.get(url)
-            print(f"Response status code: {response.status_code}")
-            
-            if response.status_code == 200:
-                # Try to open and process the image
-                img = Image.open(io.BytesIO(response.content))
-                print(f"Image mode: {img.mode}, Size: {img.size}")
-                
-                # Ensure image has alpha channel
-                if img.mode != 'RGBA':
-                    print(f"Converting {img.mode} to RGBA")
-                    img = img.convert('RGBA')
-                
-                # Resize while maintaining aspect ratio
-                img.thumbnail((80, 80), Image.Resampling.LANCZOS)
-                print(f"Resized to: {img.size}")
-                
-                # Create new image with alpha channel
-                new_img = Image.new('RGBA', (80, 80), (0, 0, 0, 0))
-                
-                # Paste resized image in center
-                x = (80 - img.width) // 2
-                y = (80 - img.height) // 2
-                new_img.paste(img, (x, y), img)
-                
-                # Save with transparency
-                new_img.save(output_path, 'PNG')
-                print(f"Successfully saved {filename}")
-            else:
-                print(f"Failed to download {filename} (Status code: {response.status_code})")
-        except Exception as e:
-            print(f"Error processing {filename}: {str(e)}")
-            import traceback
-            traceback.print_exc()
+    # Fetch all pieces concurrently over the pooled connections of one session
+    with ThreadPoolExecutor(max_workers=len(PIECE_INFO)) as executor:
+        for log in executor.map(lambda piece_info: _fetch_and_process(session, piece_info), PIECE_INFO.values()):
+            print("\n".join(log))
     
     # Verify final results
     print("\nFinal verification:")
@@ -111,6 +154,7 @@ def download_piece_images():
         print(f"Warning: Missing pieces: {', '.join(missing_pieces)}")
     else:
         print("All pieces downloaded successfully!")
+        print(f"Packed pieces into {build_piece_atlas()}")
 
 if __name__ == "__main__":
     download_piece_images() 
\ No newline at end of file
@@ -1,34 +1,112 @@
 import sys
 import chess
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                            QHBoxLayout, QLabel, QPushButton, QTextEdit, QColorDialog, QFileDialog, QInputDialog, QTabWidget, QGroupBox, QSpinBox)
-from PyQt6.QtGui import QPixmap, QPainter, QColor, QPen, QFont, QActionGroup
-from PyQt6.QtCore import Qt, QRect, QSize, pyqtSignal, QTimer
+                            QHBoxLayout, QLabel, QPushButton, QPlainTextEdit, QColorDialog, QFileDialog, QInputDialog, QTabWidget, QGroupBox, QSpinBox)
+from PyQt6.QtGui import QPixmap, QImage, QPainter, QTextCursor, QColor, QPen, QBrush, QPalette, QFont, QActionGroup
+from PyQt6.QtCore import Qt, QRect, QSize, pyqtSignal, pyqtSlot, QTimer, QObject, QRunnable, QThread, QThreadPool
 import os
+import threading
+import weakref
+from collections import OrderedDict
 from inference import ChessEngine
-from config import CHECKPOINTS_DIR, MODELS_DIR
+import config
 
-class ChessSquare(QLabel):
-    clicked = pyqtSignal(int, int)  # row, col
+# Board square shown at each (row, col) of the widget, for the normal and the flipped orientation
+SQUARE_TABLE = [[chess.square(col, 7 - row) for col in range(8)] for row in range(8)]
+FLIPPED_SQUARE_TABLE = [[chess.square(7 - col, row) for col in range(8)] for row in range(8)]
 
-    def __init__(self, row, col, size):
-        super().__init__()
-        self.row = row
-        self.col = col
-        self.size = size
-        self.setFixedSize(size, size)
-        self.setStyleSheet(self._get_background_color())
-        
-    def _get_background_color(self):
-        is_light = (self.row + self.col) % 2 == 0
-        color = "#FFFFFF" if is_light else "#769656"
-        return f"background-color: {color};"
+# Number of positions whose move notation is remembered by cached_san
+SAN_CACHE_SIZE = 1024
+_san_cache = OrderedDict()
+
+def cached_san(board, move):
+    """
+    Get board.san(move), remembered per position.
     
-    def mousePressEvent(self, event):
-        self.clicked.emit(self.row, self.col)
+    SAN runs a legal move generation to disambiguate the move and mark checks,
+    and the same move is often written out more than once (a hint that is then
+    played, or a move redone after an undo).
+    """
+    key = (board.epd(), move.uci())
+    san = _san_cache.get(key)
+    if san is None:
+        san = board.san(move)
+        _san_cache[key] = san
+        if len(_san_cache) > SAN_CACHE_SIZE:
+            _san_cache.popitem(last=False)
+    else:
+        _san_cache.move_to_end(key)
+    return san
+
+# Number of evaluated positions EngineWorker remembers per engine: several games' worth,
+# so undoing and redoing through a whole game never re-runs the network (a few MB)
+EVAL_CACHE_SIZE = 1024
+
+# Directory of the piece images and the image of each piece symbol
+PIECE_DIR = "pieces"
+PIECE_FILENAMES = {
+    'K': 'KING_WHITE.png',
+    'Q': 'QUEEN_WHITE.png',
+    'R': 'ROOK_WHITE.png',
+    'B': 'BISHOP_WHITE.png',
+    'N': 'KNIGHT_WHITE.png',
+    'P': 'PAWN_WHITE.png',
+    'k': 'KING_BLACK.png',
+    'q': 'QUEEN_BLACK.png',
+    'r': 'ROOK_BLACK.png',
+    'b': 'BISHOP_BLACK.png',
+    'n': 'KNIGHT_BLACK.png',
+    'p': 'PAWN_BLACK.png',
+}
+
+def prefetch_piece_files():
+    """
+    Read the piece images into the OS page cache.
+    
+    Runs on a plain thread while Qt and the engines start up, so the piece
+    loaders later decode from memory instead of waiting on the disk. Pure
+    I/O, no Qt calls; missing files are left for ChessBoard to report.
+    """
+    for filename in PIECE_FILENAMES.values():
+        try:
+            with open(os.path.join(PIECE_DIR, filename), 'rb') as f:
+                if hasattr(os, 'posix_fadvise'):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+                else:
+                    f.read()
+        except OSError:
+            pass
+
+# Upper bound on the number of piece images decoded at the same time
+MAX_PIECE_LOADERS = 4
+
+class PieceLoaderSignals(QObject):
+    loaded = pyqtSignal(str, str, QImage)  # piece symbol ('' for the atlas), image path, scaled image (null on failure)
+
+class PieceLoader(QRunnable):
+    """Decode and scale one piece image, or the whole piece atlas, on a worker thread."""
+
+    def __init__(self, piece, image_path, width, height, signals):
+        super().__init__()
+        self.piece = piece
+        self.image_path = image_path
+        self.width = width
+        self.height = height
+        self.signals = signals
+
+    def run(self):
+        # QImage can be used off the GUI thread; the QPixmap is made by the receiving slot
+        image = QImage(self.image_path)
+        if not image.isNull():
+            image = image.scaled(
+                self.width, self.height,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation
+            )
+        self.signals.loaded.emit(self.piece, self.image_path, image)
 
 class ChessBoard(QWidget):
-    move_made = pyqtSignal(chess.Board, object)  # Send board state before move and move data
+    move_made = pyqtSignal(bool, object, str)  # Side to move before the move, move, move text
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -36,13 +114,27 @@ class ChessBoard(QWidget):
         self.board = chess.Board()
         self.square_size = 80
         self.selected_square = None
-        self.legal_moves = set()
+        self.legal_moves = {}  # Legal moves of the selected piece by target square
+        self.legal_targets_mask = 0  # Bit i is set when a legal move of the selected piece ends on square i
         self.flipped = False  # Track if board is flipped
+        self.square_table = SQUARE_TABLE  # Board square at each (row, col), for the current orientation
         self.last_move = None  # Store the last move made
-        
-        # Load piece images
-        self.pieces = {}
-        piece_path = "pieces"
+        self.hint_move = None  # Move suggested by the engine
+        self.hint_key = None  # Position the hint was given for (python-chess transposition key)
+        
+        # Load piece images into one atlas pixmap: white pieces on the top row, black on the bottom.
+        # The atlas is in device pixels, so on HiDPI screens pieces are scaled once here and then
+        # blitted 1:1 instead of being rescaled on every paint
+        self.pixel_size = round(self.square_size * self.devicePixelRatioF())
+        size = self.pixel_size
+        self.atlas = QPixmap(6 * size, 2 * size)
+        self.atlas.fill(Qt.GlobalColor.transparent)
+        self.atlas_cells = {piece: QRect(col * size, row * size, size, size)
+                            for row, pieces in enumerate(config.PIECE_ATLAS_ROWS)
+                            for col, piece in enumerate(pieces)}
+        # Atlas cells of the pieces loaded so far, indexed by piece_type (+6 for black); 0 is unused
+        self.piece_rects = [None] * 13
+        piece_path = PIECE_DIR
         
         # Check if pieces directory exists
         if not os.path.exists(piece_path):
@@ -50,120 +142,73 @@ class ChessBoard(QWidget):
             print("Please run download_pieces.py first to download the chess pieces.")
             sys.exit(1)
         
-        # Map chess piece symbols to filenames
-        piece_filenames = {
-            'K': 'KING_WHITE.png',
-            'Q': 'QUEEN_WHITE.png',
-            'R': 'ROOK_WHITE.png',
-            'B': 'BISHOP_WHITE.png',
-            'N': 'KNIGHT_WHITE.png',
-            'P': 'PAWN_WHITE.png',
-            'k': 'KING_BLACK.png',
-            'q': 'QUEEN_BLACK.png',
-            'r': 'ROOK_BLACK.png',
-            'b': 'BISHOP_BLACK.png',
-            'n': 'KNIGHT_BLACK.png',
-            'p': 'PAWN_BLACK.png',
-        }
-            
-        for piece, filename in piece_filenames.items():
-            image_path = os.path.join(piece_path, filename)
+        # Decoding and scaling run on a small thread pool, so the window shows
+        # right away; each piece is drawn as soon as its image arrives
+        # The pool is created before the signals object so that, as children are deleted in order,
+        # the pool's destructor waits for running loaders before the object they emit through goes
+        self.loader_pool = QThreadPool(self)
+        self.loader_pool.setMaxThreadCount(min(MAX_PIECE_LOADERS, QThread.idealThreadCount()))
+        self.piece_signals = PieceLoaderSignals(self)
+        self.piece_signals.loaded.connect(self._on_piece_loaded)
+        
+        missing = list(PIECE_FILENAMES)
+        atlas_path = os.path.join(piece_path, config.PIECE_ATLAS_FILENAME)
+        if os.path.exists(atlas_path):
+            # One file open and one PNG decode for all pieces instead of twelve
+            self.loader_pool.start(PieceLoader('', atlas_path, 6 * size, 2 * size, self.piece_signals))
+            missing = []
+        
+        for piece in missing:
+            image_path = os.path.join(piece_path, PIECE_FILENAMES[piece])
             if not os.path.exists(image_path):
                 print(f"Error: {image_path} not found!")
                 print("Please run download_pieces.py to download all chess pieces.")
                 sys.exit(1)
-                
-            pixmap = QPixmap(image_path)
-            if pixmap.isNull():
-                print(f"Error: Failed to load image {image_path}")
-                sys.exit(1)
-                
-            self.pieces[piece] = pixmap.scaled(
-                self.square_size, self.square_size,
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation
-            )
-        
-        # Create layout
-        layout = QVBoxLayout()
-        
-        # Create squares
-        self.squares = [[ChessSquare(row, col, self.square_size) 
-                        for col in range(8)] for row in range(8)]
-        
-        # Create board layout with coordinates if enabled
-        board_container = QWidget()
-        board_layout = QVBoxLayout()
-        board_layout.setSpacing(0)
-        board_layout.setContentsMargins(0, 0, 0, 0)
-        
-        # Add file letters (a-h) on top if coordinates are enabled
-        if self.parent and self.parent.settings['game']['show_coordinates']:
-            file_layout = QHBoxLayout()
-            file_layout.setSpacing(0)
-            file_layout.setContentsMargins(0, 0, 0, 0)
-            
-            # Add spacer for rank labels
-            spacer = QLabel()
-            spacer.setFixedSize(20, 20)
-            file_layout.addWidget(spacer)
             
-            # Add file letters (a to h from left to right when not flipped)
-            for file in range(8):
-                file_label = QLabel(chr(ord('a') + (file if not self.flipped else 7 - file)))
-                file_label.setFixedSize(self.square_size, 20)
-                file_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                file_layout.addWidget(file_label)
-            
-            board_layout.addLayout(file_layout)
-        
-        # Create main board grid with rank numbers
-        board_grid = QHBoxLayout()
-        board_grid.setSpacing(0)
-        board_grid.setContentsMargins(0, 0, 0, 0)
-        
-        # Add rank numbers on left if coordinates are enabled
-        if self.parent and self.parent.settings['game']['show_coordinates']:
-            rank_column = QVBoxLayout()
-            rank_column.setSpacing(0)
-            rank_column.setContentsMargins(0, 0, 0, 0)
-            
-            # Add rank numbers (8 to 1 from top to bottom when not flipped)
-            for rank in range(8):
-                rank_label = QLabel(str(8 - rank if not self.flipped else rank + 1))
-                rank_label.setFixedSize(20, self.square_size)
-                rank_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                rank_column.addWidget(rank_label)
-            
-            board_grid.addLayout(rank_column)
-        
-        # Create squares grid
-        squares_widget = QWidget()
-        squares_layout = QVBoxLayout()
-        squares_layout.setSpacing(0)
-        squares_layout.setContentsMargins(0, 0, 0, 0)
-        
-        for row in range(8):
-            row_layout = QHBoxLayout()
-            row_layout.setSpacing(0)
-            row_layout.setContentsMargins(0, 0, 0, 0)
-            
-            for col in range(8):
-                square = self.squares[row][col]
-                square.clicked.connect(self.square_clicked)
-                row_layout.addWidget(square)
-            
-            squares_layout.addLayout(row_layout)
-        
-        squares_widget.setLayout(squares_layout)
-        board_grid.addWidget(squares_widget)
-        board_layout.addLayout(board_grid)
+            self.loader_pool.start(PieceLoader(piece, image_path, size, size, self.piece_signals))
         
-        board_container.setLayout(board_layout)
-        layout.addWidget(board_container)
-        self.setLayout(layout)
+        self.apply_settings()
+    
+    def apply_settings(self):
+        """Pick up the coordinate, theme and highlight settings; the pieces and position are kept."""
+        # The whole board is drawn by paintEvent; coordinates take a margin on the top and left
+        self.show_coordinates = bool(self.parent and self.parent.settings['game']['show_coordinates'])
+        self.margin = 20 if self.show_coordinates else 0
+        self.setFixedSize(8 * self.square_size + self.margin, 8 * self.square_size + self.margin)
+        
+        # Brushes and pens are built here rather than per paint
+        self.square_brushes = [QBrush(QColor(self._get_square_color(0, 0))),
+                               QBrush(QColor(self._get_square_color(0, 1)))]
+        self.highlight_pens = {}
+        if self.parent:
+            for highlight_type, color in self.parent.settings['visual']['highlight_colors'].items():
+                self.highlight_pens[highlight_type] = QPen(QColor(color), 2)
+        self.update()
+    
+    def _on_piece_loaded(self, piece, image_path, image):
+        """Store a piece image decoded by a PieceLoader and redraw."""
+        if image.isNull():
+            print(f"Error: Failed to load image {image_path}")
+            QApplication.exit(1)
+            return
         
-        self.update_board()
+        if piece:
+            self._add_to_atlas(piece, QPixmap.fromImage(image))
+        else:
+            # The whole atlas image: copy each cell, so a file with other proportions still lines up
+            for symbol, cell in self.atlas_cells.items():
+                self._add_to_atlas(symbol, QPixmap.fromImage(image.copy(cell)))
+        self.update()
+    
+    def _add_to_atlas(self, piece, pixmap):
+        """Draw a scaled piece pixmap centered in its atlas cell."""
+        cell = self.atlas_cells[piece]
+        painter = QPainter(self.atlas)
+        painter.drawPixmap(cell.x() + (cell.width() - pixmap.width()) // 2,
+                           cell.y() + (cell.height() - pixmap.height()) // 2, pixmap)
+        painter.end()
+        loaded = chess.Piece.from_symbol(piece)
+        self.piece_rects[loaded.piece_type + (0 if loaded.color else 6)] = cell
     
     def _get_square_color(self, row, col):
         """Get the background color for a square based on current theme."""
@@ -174,102 +219,206 @@ class ChessBoard(QWidget):
         colors = self.parent.settings['visual']['colors'][theme if theme != 'Custom Colors' else 'custom']
         return colors['light'] if (row + col) % 2 == 0 else colors['dark']
     
-    def update_board(self):
+    def paintEvent(self, event):
+        """Draw the squares, pieces, highlights and coordinates in one pass."""
+        painter = QPainter(self)
+        size = self.square_size
+        
+        # Work out the highlighted squares once per paint rather than once per square
+        show_hint = self.hint_move is not None and self.hint_key == self.board._transposition_key()
+        check_square = self.board.king(self.board.turn) if self.board.is_check() else None
+        legal_targets_mask = self.legal_targets_mask if self.parent and self.parent.settings['game']['show_legal_moves'] else 0
+        pieces = self.board.piece_map()  # Only the occupied squares, in one pass over the bitboards
+        square_table = self.square_table
+        piece_rects = self.piece_rects
+        
         for row in range(8):
             for col in range(8):
-                square = self.squares[row][col]
-                square_idx = self.get_square_position(row, col)
-                piece = self.board.piece_at(square_idx)
-                
-                # Clear any existing pixmap
-                square.clear()
-                
-                # Set piece image if there is a piece
-                if piece:
-                    square.setPixmap(self.pieces[piece.symbol()])
+                rect = QRect(self.margin + col * size, self.margin + row * size, size, size)
+                square_idx = square_table[row][col]
+                painter.fillRect(rect, self.square_brushes[(row + col) % 2])
                 
-                # Get base color
-                base_color = self._get_square_color(row, col)
-                style = f"background-color: {base_color};"
+                piece = pieces.get(square_idx)
+                source = piece_rects[piece.piece_type + (0 if piece.color else 6)] if piece else None  # None until the image is loaded
+                if source is not None:
+                    painter.drawPixmap(rect, self.atlas, source)
                 
                 # Add highlights based on settings
-                if self.parent:
+                highlight = None
+                if self.highlight_pens:
+                    # A hint replaces the other highlights until the board changes
+                    if show_hint:
+                        if square_idx in (self.hint_move.from_square, self.hint_move.to_square):
+                            highlight = 'hint'
                     # Selected piece highlight
-                    if self.selected_square == (row, col):
-                        style += f" border: 2px solid {self.parent.settings['visual']['highlight_colors']['selected_piece']};"
+                    elif self.selected_square == (row, col):
+                        highlight = 'selected_piece'
                     # Legal moves highlight
-                    elif self.parent.settings['game']['show_legal_moves'] and square_idx in [move.to_square for move in self.legal_moves]:
-                        style += f" border: 2px solid {self.parent.settings['visual']['highlight_colors']['legal_moves']};"
+                    elif (legal_targets_mask >> square_idx) & 1:
+                        highlight = 'legal_moves'
                     # Last move highlight
-                    elif self.last_move and square_idx in [self.last_move.from_square, self.last_move.to_square]:
-                        style += f" border: 2px solid {self.parent.settings['visual']['highlight_colors']['last_move']};"
+                    elif self.last_move and square_idx in (self.last_move.from_square, self.last_move.to_square):
+                        highlight = 'last_move'
                     # Check highlight
-                    elif self.board.is_check() and piece and piece.piece_type == chess.KING and piece.color == self.board.turn:
-                        style += f" border: 2px solid {self.parent.settings['visual']['highlight_colors']['check']};"
+                    elif square_idx == check_square:
+                        highlight = 'check'
                 
-                square.setStyleSheet(style)
+                if highlight:
+                    painter.setPen(self.highlight_pens[highlight])
+                    painter.drawRect(rect.adjusted(1, 1, -2, -2))
+        
+        if self.show_coordinates:
+            painter.setPen(self.palette().color(QPalette.ColorRole.WindowText))
+            for i in range(8):
+                # Files a to h from left to right and ranks 8 to 1 from top to bottom when not flipped
+                file_label = chr(ord('a') + (i if not self.flipped else 7 - i))
+                rank_label = str(8 - i if not self.flipped else i + 1)
+                painter.drawText(QRect(self.margin + i * size, 0, size, self.margin),
+                                 Qt.AlignmentFlag.AlignCenter, file_label)
+                painter.drawText(QRect(0, self.margin + i * size, self.margin, size),
+                                 Qt.AlignmentFlag.AlignCenter, rank_label)
+        
+        painter.end()
+    
+    def mousePressEvent(self, event):
+        """Map a click to the square under the cursor."""
+        pos = event.position().toPoint()
+        x = pos.x() - self.margin
+        y = pos.y() - self.margin
+        board_size = 8 * self.square_size
+        if 0 <= x < board_size and 0 <= y < board_size:
+            self.square_clicked(y // self.square_size, x // self.square_size)
+    
+    def show_hint(self, move):
+        """Highlight a suggested move until the position changes."""
+        self.hint_move = move
+        self.hint_key = self.board._transposition_key()
+        self.update()
     
     def flip_board(self, flipped):
         """Flip the board view."""
         self.flipped = flipped
-        if self.parent and self.parent.settings['game']['show_coordinates']:
-            # Store current board state
-            current_board = self.board.copy()
-            
-            # Reinitialize the board with new orientation
-            self.__init__(self.parent)
-            self.board = current_board
-            
-        self.update_board()
+        self.square_table = FLIPPED_SQUARE_TABLE if flipped else SQUARE_TABLE
+        self.update()
     
-    def get_square_position(self, row, col):
-        """Get the actual board position based on whether the board is flipped."""
-        if self.flipped:
-            return chess.square(7-col, row)  # Flip both row and column
-        else:
-            return chess.square(col, 7-row)  # Normal orientation
+    def _highlight_mask(self):
+        """Bitmask of the squares outlined for the current selection and hint."""
+        mask = self.legal_targets_mask
+        if self.selected_square is not None:
+            row, col = self.selected_square
+            mask |= 1 << self.square_table[row][col]
+        if self.hint_move is not None:
+            mask |= (1 << self.hint_move.from_square) | (1 << self.hint_move.to_square)
+        return mask
+    
+    def _update_squares(self, mask):
+        """Schedule a repaint of only the squares whose bits are set in mask."""
+        size = self.square_size
+        while mask:
+            square_idx = (mask & -mask).bit_length() - 1
+            mask &= mask - 1
+            file, rank = chess.square_file(square_idx), chess.square_rank(square_idx)
+            row, col = (rank, 7 - file) if self.flipped else (7 - rank, file)
+            self.update(QRect(self.margin + col * size, self.margin + row * size, size, size))
     
     def square_clicked(self, row, col):
         # Get the actual board position
-        square_idx = self.get_square_position(row, col)
+        square_idx = self.square_table[row][col]
         
         if self.selected_square is None:
             # First click - select piece
             piece = self.board.piece_at(square_idx)
-            if piece and piece.color == self.board.turn:
-                self.selected_square = (row, col)
-                self.legal_moves = [move for move in self.board.legal_moves 
-                                  if move.from_square == square_idx]
-                self.update_board()  # Update to show legal moves
+            if piece is None or piece.color != self.board.turn:
+                return  # Empty square or opponent's piece: nothing changes, nothing to repaint
+            # A click only changes the outlines, so just the squares outlined before or after are repainted
+            dirty = self._highlight_mask()
+            self.selected_square = (row, col)
+            self.legal_moves = {}
+            self.legal_targets_mask = 0
+            for move in self.board.generate_legal_moves(from_mask=chess.BB_SQUARES[square_idx]):
+                # Promotions share a target square; keep the first one generated (the queen)
+                self.legal_moves.setdefault(move.to_square, move)
+                self.legal_targets_mask |= 1 << move.to_square
+            self.hint_move = None
+            self._update_squares(dirty | self._highlight_mask())  # Update to show legal moves
         else:
             # Second click - make move if legal
-            from_square = self.get_square_position(self.selected_square[0], self.selected_square[1])
-            to_square = square_idx  # Use the actual board position
-            
-            # Find the actual legal move object that matches our move
-            legal_move = None
-            for m in self.legal_moves:
-                if m.from_square == from_square and m.to_square == to_square:
-                    legal_move = m
-                    break
+            dirty = self._highlight_mask()  # Outlines of the selection and its legal moves, cleared below
+            legal_move = self.legal_moves.get(square_idx)
             
             if legal_move is not None:
                 # Store the move text before making the move
-                move_text = self.board.san(legal_move)
-                # Send board state before move and move data
-                self.move_made.emit(self.board.copy(), (legal_move, move_text))
+                move_text = cached_san(self.board, legal_move)
+                # The board is left unchanged; the receiver decides whether to play the move
+                self.move_made.emit(self.board.turn, legal_move, move_text)
             
             self.selected_square = None
-            self.legal_moves = set()
-            self.update_board()
+            self.legal_moves = {}
+            self.legal_targets_mask = 0
+            self._update_squares(dirty)
+
+class EngineWorker(QObject):
+    """Runs network evaluations on its own thread so the window stays responsive."""
+    finished = pyqtSignal(str, str, float, object, str, object)  # purpose, FEN, value, best move, its SAN, move probabilities
+
+    def __init__(self):
+        super().__init__()
+        # Recent results per engine, by position without the move clocks; only touched on the worker thread.
+        # A hint followed by the same move, or an undo followed by a redo, evaluates a position twice.
+        # Weak keys let the results of a replaced model go with it.
+        self.cache = weakref.WeakKeyDictionary()
+        # (purpose, FEN) of the newest request, set from the GUI thread; older queued requests are skipped
+        self.latest_request = None
+
+    @pyqtSlot(object, str, str)
+    def evaluate(self, engine, fen, purpose):
+        if (purpose, fen) != self.latest_request:
+            return  # Superseded while waiting in the queue; nobody wants this result anymore
+        positions = self.cache.setdefault(engine, OrderedDict())
+        key = ' '.join(fen.split()[:4])
+        result = positions.get(key)
+        if result is None:
+            board = chess.Board(fen)
+            value, best_move, move_probs = engine.evaluate_position(board)
+            # Write the move out here as well, so the GUI thread needs no move generation for it
+            best_san = board.san(best_move) if best_move else ''
+            result = (value, best_move, best_san, move_probs)
+            positions[key] = result
+            if len(positions) > EVAL_CACHE_SIZE:
+                positions.popitem(last=False)
+        else:
+            positions.move_to_end(key)
+        self.finished.emit(purpose, fen, *result)
 
 class ChessGUI(QMainWindow):
+    evaluation_requested = pyqtSignal(object, str, str)  # engine, FEN, purpose
+
     def __init__(self, engine_path):
         super().__init__()
-        # Create two engines for White and Black
-        self.white_engine = ChessEngine(engine_path)
-        self.black_engine = ChessEngine(engine_path)  # Initially same as white
-        self.move_stack = []
+        # Engines for White and Black; both sides share one engine while they use the same model file
+        self.engines = {}  # Loaded engines by (real path, modification time) of their model file
+        self.white_engine = self.load_engine(engine_path)
+        self.black_engine = self.load_engine(engine_path)  # Initially same as white
+        
+        # Evaluations run on a worker thread; results come back to _on_evaluation
+        self.engine_thread = QThread(self)
+        self.engine_worker = EngineWorker()
+        self.engine_worker.moveToThread(self.engine_thread)
+        self.evaluation_requested.connect(self.engine_worker.evaluate)
+        self.engine_worker.finished.connect(self._on_evaluation)
+        self.engine_thread.start()
+        self.pending_evaluation = None  # (purpose, FEN) of the evaluation whose result is awaited
+        
+        # Undo/redo refresh the evaluation label through this timer so a burst of clicks runs one evaluation
+        self.eval_timer = QTimer(self)
+        self.eval_timer.setSingleShot(True)
+        self.eval_timer.setInterval(120)
+        self.eval_timer.timeout.connect(self.refresh_eval_label)
+        
+        self.move_stack = []  # (move, SAN) of each move played, so redo doesn't write moves out again
+        self.history_marks = []  # Position in the move history where each move of move_stack starts
+        self.board_version = 0  # Bumped on every push/pop so per-position results can be cached
+        self.outcome_cache = None  # (board_version, outcome) of the last game-over check
         self.redo_stack = []
         self.hint_move = None
         self.playing_as_white = True
@@ -292,6 +441,7 @@ class ChessGUI(QMainWindow):
                     'legal_moves': "#00FF00",
                     'selected_piece': "#FFFF00",
                     'last_move': "#0000FF",
+                    'hint': "#FF8C00",
                     'check': "#FF0000"
                 }
             },
@@ -308,6 +458,21 @@ class ChessGUI(QMainWindow):
         self.init_ui()
         self.create_menus()
     
+    def load_engine(self, model_path):
+        """
+        Load a model for play, reusing the engine already loaded from the same file.
+        
+        The GUI evaluates one position at a time, so the model runs in reduced precision.
+        A file that was rewritten since it was loaded (e.g. a new checkpoint) is loaded again.
+        """
+        key = (os.path.realpath(model_path), os.path.getmtime(model_path))
+        engine = self.engines.get(key)
+        if engine is None:
+            engine = ChessEngine(model_path)
+            engine.optimize_for_inference()
+            self.engines[key] = engine
+        return engine
+    
     def create_menus(self):
         # Create menu bar
         menubar = self.menuBar()
@@ -425,12 +590,15 @@ class ChessGUI(QMainWindow):
         if file_name:
             if side == 'white':
                 self.settings['engine']['white_model_path'] = file_name
-                self.white_engine = ChessEngine(file_name)
+                self.white_engine = self.load_engine(file_name)
                 self.white_model_label.setText(f"Model: {os.path.basename(file_name)}")
             else:
                 self.settings['engine']['black_model_path'] = file_name
-                self.black_engine = ChessEngine(file_name)
+                self.black_engine = self.load_engine(file_name)
                 self.black_model_label.setText(f"Model: {os.path.basename(file_name)}")
+            # Let go of a model neither side plays with anymore
+            self.engines = {key: engine for key, engine in self.engines.items()
+                            if engine is self.white_engine or engine is self.black_engine}
     
     def set_eval_threshold(self):
         """Open dialog to set evaluation threshold."""
@@ -452,36 +620,12 @@ class ChessGUI(QMainWindow):
     
     def apply_settings(self):
         """Apply the current settings to the GUI."""
-        # Update board colors
-        theme = self.settings['visual']['board_theme']
-        colors = self.settings['visual']['colors'][theme if theme != 'Custom Colors' else 'custom']
-        
-        # Rebuild board if coordinates setting changed
-        self.rebuild_board()
-        
-        # Update board display
-        self.board_widget.update_board()
+        # Update board colors, highlights and coordinates in place
+        self.board_widget.apply_settings()
         
         # Update evaluation display
         self.eval_label.setVisible(self.settings['engine']['show_evaluation'])
     
-    def rebuild_board(self):
-        """Rebuild the board layout to show/hide coordinates."""
-        # Store current board state and orientation
-        current_board = self.board_widget.board.copy()
-        current_flipped = self.board_widget.flipped
-        
-        # Create new board with current settings
-        self.board_widget = ChessBoard(self)
-        self.board_widget.board = current_board
-        self.board_widget.flipped = current_flipped
-        self.board_widget.move_made.connect(self.on_player_move)
-        
-        # Replace old board widget in layout
-        old_board = self.centralWidget().layout().itemAt(0).widget()
-        self.centralWidget().layout().replaceWidget(old_board, self.board_widget)
-        old_board.deleteLater()
-    
     def init_ui(self):
         self.setWindowTitle('Chess AI GUI')
         
@@ -518,7 +662,7 @@ class ChessGUI(QMainWindow):
         history_layout = QVBoxLayout()
         
         # Move history
-        self.move_history = QTextEdit()
+        self.move_history = QPlainTextEdit()  # Plain-text log: no rich-text layout on every append
         self.move_history.setReadOnly(True)
         history_layout.addWidget(QLabel('Move History:'))
         history_layout.addWidget(self.move_history)
@@ -648,119 +792,159 @@ class ChessGUI(QMainWindow):
     
     def new_game(self):
         self.board_widget.board = chess.Board()
-        self.board_widget.update_board()
+        self.board_version += 1
+        self.board_widget.hint_move = None
+        self.board_widget.update()
         self.move_history.clear()
+        self.history_marks.clear()
         self.eval_label.setText('Evaluation: 0.0')
         self.hint_label.setText('')
         self.move_stack.clear()
         self.redo_stack.clear()
         self.hint_move = None
+        self.pending_evaluation = None  # Ignore anything still being computed for the old game
+        self.eval_timer.stop()
         self.update_button_states()
         
         # If playing as Black, make AI move first
         if not self.playing_as_white:
             self.make_ai_move()
     
-    def make_ai_move(self):
+    def request_evaluation(self, purpose):
+        """
+        Ask the engine thread to evaluate the current position.
+        
+        Args:
+            purpose: What the result is for: 'move' (AI reply), 'hint', 'self_play' or 'eval' (label only)
+        """
+        board = self.board_widget.board
         # Use appropriate engine based on current turn
-        engine = self.white_engine if self.board_widget.board.turn == chess.WHITE else self.black_engine
-        value, best_move, move_probs = engine.evaluate_position(self.board_widget.board)
+        engine = self.white_engine if board.turn == chess.WHITE else self.black_engine
+        fen = board.fen()
+        self.eval_timer.stop()  # Any new request supersedes a debounced label refresh
+        self.pending_evaluation = (purpose, fen)
+        self.engine_worker.latest_request = self.pending_evaluation
+        self.evaluation_requested.emit(engine, fen, purpose)
+        if not self.is_self_playing:
+            self.update_button_states()
+    
+    def schedule_eval_refresh(self):
+        """Restart the debounce timer for the evaluation label."""
+        if self.pending_evaluation is not None and self.pending_evaluation[0] == 'eval':
+            self.pending_evaluation = None  # That result is for a position no longer on the board
+        self.eval_timer.start()
+    
+    def refresh_eval_label(self):
+        """Evaluate the current position for the evaluation label."""
+        self.request_evaluation('eval')
+    
+    def _on_evaluation(self, purpose, fen, value, best_move, best_san, move_probs):
+        """Receive an evaluation from the engine thread."""
+        # Drop results that were superseded or are for a position no longer on the board
+        if self.pending_evaluation != (purpose, fen):
+            return
+        self.pending_evaluation = None
+        
+        if purpose == 'move':
+            self._on_ai_move_ready(value, best_move, best_san)
+        elif purpose == 'hint':
+            self._on_hint_ready(best_move, best_san)
+        elif purpose == 'self_play':
+            self._on_self_play_move_ready(value, best_move, best_san)
+        else:
+            self._on_eval_ready(value)
+        
+        if not self.is_self_playing:
+            self.update_button_states()
+    
+    def _outcome(self):
+        """Return the game outcome (None while the game goes on), computed once per position."""
+        if self.outcome_cache is None or self.outcome_cache[0] != self.board_version:
+            self.outcome_cache = (self.board_version, self.board_widget.board.outcome())
+        return self.outcome_cache[1]
+    
+    def _is_game_over(self):
+        return self._outcome() is not None
+    
+    def make_ai_move(self):
+        """Start computing the AI's move; it is played by _on_ai_move_ready."""
+        self.request_evaluation('move')
+    
+    def _on_ai_move_ready(self, value, best_move, best_san):
         self.eval_label.setText(f'Evaluation: {value:.3f}')
         
         if best_move:
-            # Store move text and algebraic notation before making the move
-            ai_move_text = self.board_widget.board.san(best_move)
             ai_move_uci = best_move.uci()
             # Make the move
             self.board_widget.board.push(best_move)
+            self.board_version += 1
             # Add AI move to stack
-            self.move_stack.append(best_move)
-            # Update history with stored text and algebraic notation
+            self.move_stack.append((best_move, best_san))
+            # Update history with the engine's move text and algebraic notation
             prefix = "White: " if self.board_widget.board.turn == chess.BLACK else "Black: "
-            self.move_history.append(f"{prefix}{ai_move_text} ({ai_move_uci})\n")
-            self.board_widget.update_board()
-            return True
-        return False
+            self.add_history_line(f"{prefix}{best_san} ({ai_move_uci})\n")
+            self.board_widget.update()
+            
+            if self._is_game_over():
+                result = self._outcome().result()
+                self.move_history.appendPlainText(f"\nGame Over! Result: {result}")
     
     def show_hint(self):
-        if not self.board_widget.board.is_game_over() and self.board_widget.board.turn == (chess.WHITE if self.playing_as_white else chess.BLACK):
-            # Use appropriate engine based on current turn
-            engine = self.white_engine if self.board_widget.board.turn == chess.WHITE else self.black_engine
-            value, best_move, move_probs = engine.evaluate_position(self.board_widget.board)
-            if best_move:
-                move_text = self.board_widget.board.san(best_move)
-                self.hint_label.setText(f'Suggested move: {move_text}')
-                self.hint_move = best_move
-                
-                # Get the source and target squares
-                from_square = best_move.from_square
-                to_square = best_move.to_square
-                
-                # Convert to board coordinates based on orientation
-                if self.board_widget.flipped:
-                    from_row = chess.square_rank(from_square)
-                    from_col = 7 - chess.square_file(from_square)
-                    to_row = chess.square_rank(to_square)
-                    to_col = 7 - chess.square_file(to_square)
-                else:
-                    from_row = 7 - chess.square_rank(from_square)
-                    from_col = chess.square_file(from_square)
-                    to_row = 7 - chess.square_rank(to_square)
-                    to_col = chess.square_file(to_square)
-                
-                # Update all squares with current theme colors
-                for row in range(8):
-                    for col in range(8):
-                        square = self.board_widget.squares[row][col]
-                        base_color = self.board_widget._get_square_color(row, col)
-                        if (row, col) in [(from_row, from_col), (to_row, to_col)]:
-                            # Highlight hint squares using the last move highlight color
-                            square.setStyleSheet(
-                                f"background-color: {base_color}; border: 2px solid {self.settings['visual']['highlight_colors']['last_move']};"
-                            )
-                        else:
-                            square.setStyleSheet(f"background-color: {base_color};")
+        if not self._is_game_over() and self.board_widget.board.turn == (chess.WHITE if self.playing_as_white else chess.BLACK):
+            self.request_evaluation('hint')
+    
+    def _on_hint_ready(self, best_move, best_san):
+        if best_move:
+            self.hint_label.setText(f'Suggested move: {best_san}')
+            self.hint_move = best_move
+            self.board_widget.show_hint(best_move)
+    
+    def _on_eval_ready(self, value):
+        self.eval_label.setText(f'Evaluation: {value:.3f}')
+    
+    def add_history_line(self, text):
+        """Append a move to the move history, remembering where it starts so undo can cut it off."""
+        self.history_marks.append(self.move_history.document().characterCount() - 1)
+        self.move_history.appendPlainText(text)
     
     def update_button_states(self):
-        self.undo_btn.setEnabled(len(self.move_stack) > 0)
-        self.redo_btn.setEnabled(len(self.redo_stack) > 0)
+        # Moves can't be taken back or suggested while the AI is still thinking about its reply
+        thinking = self.pending_evaluation is not None and self.pending_evaluation[0] in ('move', 'hint')
+        self.undo_btn.setEnabled(len(self.move_stack) > 0 and not thinking)
+        self.redo_btn.setEnabled(len(self.redo_stack) > 0 and not thinking)
         self.hint_btn.setEnabled(
-            not self.board_widget.board.is_game_over() and 
+            not thinking and
+            not self._is_game_over() and 
             self.board_widget.board.turn == (chess.WHITE if self.playing_as_white else chess.BLACK)
         )
     
-    def on_player_move(self, board_before_move, move_data):
-        move, move_text = move_data
-        # Verify it's the player's turn using board state before move
-        is_player_turn = (board_before_move.turn == chess.WHITE) == self.playing_as_white
+    def on_player_move(self, turn_before_move, move, move_text):
+        # Verify it's the player's turn using the side to move before the move
+        is_player_turn = (turn_before_move == chess.WHITE) == self.playing_as_white
         if not is_player_turn:
-            # Undo the move in the board
-            self.board_widget.board = board_before_move.copy()
-            self.board_widget.update_board()
+            # The board hasn't been changed, so there is nothing to undo
             return
         
-        # Make the player's move on a fresh board copy
-        self.board_widget.board = board_before_move.copy()
+        # Make the player's move
         move_uci = move.uci()  # Get algebraic notation
         self.board_widget.board.push(move)
-        self.board_widget.update_board()
+        self.board_version += 1
+        self.board_widget.update()
         
         # Clear redo stack when a new move is made
         self.redo_stack.clear()
         # Add move to stack
-        self.move_stack.append(move)
+        self.move_stack.append((move, move_text))
         # Update move history with move text and algebraic notation
         prefix = "White: " if self.playing_as_white else "Black: "
-        self.move_history.append(f"{prefix}{move_text} ({move_uci})")
+        self.add_history_line(f"{prefix}{move_text} ({move_uci})")
         
-        if not self.board_widget.board.is_game_over():
+        if not self._is_game_over():
             # AI's turn
-            if self.make_ai_move() and not self.board_widget.board.is_game_over():
-                self.update_button_states()
-        
-        if self.board_widget.board.is_game_over():
-            result = self.board_widget.board.result()
-            self.move_history.append(f"\nGame Over! Result: {result}")
+            self.make_ai_move()
+        else:
+            result = self._outcome().result()
+            self.move_history.appendPlainText(f"\nGame Over! Result: {result}")
         
         self.update_button_states()
     
@@ -770,56 +954,52 @@ class ChessGUI(QMainWindow):
             ai_move = self.move_stack.pop()
             self.redo_stack.append(ai_move)
             self.board_widget.board.pop()
+            self.board_version += 1
             
             # Undo player move
             player_move = self.move_stack.pop()
             self.redo_stack.append(player_move)
             self.board_widget.board.pop()
+            self.board_version += 1
             
-            # Update move history by removing the last complete move (both white and black)
-            text = self.move_history.toPlainText()
-            lines = text.split('\n')
-            # Remove empty lines and keep only complete moves
-            lines = [line for line in lines if line.strip()]
-            # Remove last two lines (White and Black moves)
-            if len(lines) >= 2:
-                lines = lines[:-2]
-            # Reconstruct text with proper formatting
-            self.move_history.setText('\n'.join(lines + ['']))  # Add empty line at end
+            # Cut the move history back to where the player's move was added
+            cursor = self.move_history.textCursor()
+            cursor.setPosition(self.history_marks[-2])
+            del self.history_marks[-2:]
+            cursor.movePosition(QTextCursor.MoveOperation.End, QTextCursor.MoveMode.KeepAnchor)
+            cursor.removeSelectedText()
             
-            self.board_widget.update_board()
+            self.board_widget.update()
             self.update_button_states()
             
-            # Update evaluation
-            value, _, _ = self.engine.evaluate_position(self.board_widget.board)
-            self.eval_label.setText(f'Evaluation: {value:.3f}')
+            # Update evaluation once the clicks settle
+            self.schedule_eval_refresh()
     
     def redo_move(self):
         if len(self.redo_stack) >= 2:  # Redo both player and AI moves
-            # Redo player move
-            player_move = self.redo_stack.pop()
-            self.move_stack.append(player_move)
-            move_text = self.board_widget.board.san(player_move)
+            # Redo player move, with the move text stored when it was first played
+            player_move, move_text = self.redo_stack.pop()
+            self.move_stack.append((player_move, move_text))
             move_uci = player_move.uci()
             self.board_widget.board.push(player_move)
+            self.board_version += 1
             prefix = "White: " if self.playing_as_white else "Black: "
-            self.move_history.append(f"{prefix}{move_text} ({move_uci})")
+            self.add_history_line(f"{prefix}{move_text} ({move_uci})")
             
             # Redo AI move
-            ai_move = self.redo_stack.pop()
-            self.move_stack.append(ai_move)
-            move_text = self.board_widget.board.san(ai_move)
+            ai_move, move_text = self.redo_stack.pop()
+            self.move_stack.append((ai_move, move_text))
             move_uci = ai_move.uci()
             self.board_widget.board.push(ai_move)
+            self.board_version += 1
             prefix = "Black: " if self.playing_as_white else "White: "
-            self.move_history.append(f"{prefix}{move_text} ({move_uci})\n")
+            self.add_history_line(f"{prefix}{move_text} ({move_uci})\n")
             
-            self.board_widget.update_board()
+            self.board_widget.update()
             self.update_button_states()
             
-            # Update evaluation
-            value, _, _ = self.engine.evaluate_position(self.board_widget.board)
-            self.eval_label.setText(f'Evaluation: {value:.3f}')
+            # Update evaluation once the clicks settle
+            self.schedule_eval_refresh()
     
     def toggle_self_play(self):
         """Toggle AI self-play mode."""
@@ -843,7 +1023,7 @@ class ChessGUI(QMainWindow):
             self.self_play_timer.start(self.delay_spinbox.value())
             
             # Make first move if it's AI's turn
-            if not self.board_widget.board.is_game_over():
+            if not self._is_game_over():
                 self.make_self_play_move()
         else:
             # Stop self-play
@@ -854,6 +1034,8 @@ class ChessGUI(QMainWindow):
         if self.self_play_timer:
             self.self_play_timer.stop()
         self.is_self_playing = False
+        if self.pending_evaluation and self.pending_evaluation[0] == 'self_play':
+            self.pending_evaluation = None
         self.self_play_btn.setText('Start Self-Play')
         self.switch_sides_btn.setEnabled(True)
         self.hint_btn.setEnabled(True)
@@ -862,39 +1044,49 @@ class ChessGUI(QMainWindow):
     
     def make_self_play_move(self):
         """Make a move in self-play mode."""
-        if not self.board_widget.board.is_game_over():
-            # Use appropriate engine based on current turn
-            engine = self.white_engine if self.board_widget.board.turn == chess.WHITE else self.black_engine
-            value, best_move, move_probs = engine.evaluate_position(self.board_widget.board)
-            
-            if best_move:
-                # Store move text before making the move
-                move_text = self.board_widget.board.san(best_move)
-                move_uci = best_move.uci()
-                
-                # Make the move
-                self.board_widget.board.push(best_move)
-                self.move_stack.append(best_move)
-                
-                # Update move history
-                prefix = "White: " if self.board_widget.board.turn == chess.BLACK else "Black: "
-                self.move_history.append(f"{prefix}{move_text} ({move_uci})\n")
-                
-                # Update evaluation
-                self.eval_label.setText(f'Evaluation: {value:.3f}')
-                
-                # Update display
-                self.board_widget.update_board()
-                
-                # Stop if game is over
-                if self.board_widget.board.is_game_over():
-                    result = self.board_widget.board.result()
-                    self.move_history.append(f"\nGame Over! Result: {result}")
-                    self.stop_self_play()
+        if self.pending_evaluation is not None:
+            # Still thinking about the previous move
+            return
+        if not self._is_game_over():
+            self.request_evaluation('self_play')
         else:
             self.stop_self_play()
+    
+    def _on_self_play_move_ready(self, value, best_move, best_san):
+        if best_move:
+            move_uci = best_move.uci()
+            
+            # Make the move
+            self.board_widget.board.push(best_move)
+            self.board_version += 1
+            self.move_stack.append((best_move, best_san))
+            
+            # Update move history
+            prefix = "White: " if self.board_widget.board.turn == chess.BLACK else "Black: "
+            self.add_history_line(f"{prefix}{best_san} ({move_uci})\n")
+            
+            # Update evaluation
+            self.eval_label.setText(f'Evaluation: {value:.3f}')
+            
+            # Update display
+            self.board_widget.update()
+            
+            # Stop if game is over
+            if self._is_game_over():
+                result = self._outcome().result()
+                self.move_history.appendPlainText(f"\nGame Over! Result: {result}")
+                self.stop_self_play()
+    
+    def closeEvent(self, event):
+        """Stop the engine thread before the window goes away."""
+        self.engine_thread.quit()
+        self.engine_thread.wait()
+        super().closeEvent(event)
 
 def main():
+    # Warm the page cache with the piece images while Qt initializes
+    threading.Thread(target=prefetch_piece_files, daemon=True).start()
+    
     app = QApplication(sys.argv)
     
     # Create pieces directory and download images if needed
@@ -904,7 +1096,7 @@ def main():
         print("Please add chess piece images to the 'pieces' directory")
         return
     
-    engine_path = os.path.join(CHECKPOINTS_DIR, "model_epoch_20.pt")
+    engine_path = os.path.join(config.CHECKPOINTS_DIR, "model_epoch_20.pt")
     gui = ChessGUI(engine_path)
     gui.show()
     sys.exit(app.exec())
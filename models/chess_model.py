@@ -101,8 +101,9 @@ def value_loss_fn(pred_values, target_values):
 def policy_loss_fn(policy_logits, target_moves):
     """
     Compute cross-entropy loss for the policy head.
-    Ensures both inputs have correct shape and dtype float32.
+    Takes the played move as a class index of shape [batch_size] (from * 64 + to)
+    rather than a one-hot vector, so no dense 4096-wide target is ever built.
     """
     policy_logits = policy_logits.float()
-    target_moves = target_moves.float()
+    target_moves = target_moves.long().view(-1)
     return F.cross_entropy(policy_logits, target_moves)
\ No newline at end of file
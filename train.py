@@ -8,11 +8,16 @@ import sys
 
 # Add project root to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from config import CHECKPOINTS_DIR
+import config
 from models.chess_model import ChessNet, value_loss_fn, policy_loss_fn
-from data.chess_dataset import ChessDataset
+from torch.utils.data import IterableDataset
+from data.chess_dataset import ChessDataset, InMemoryChessDataset, ChessDatasetMmap, collate_samples, load_cached_dataset
+from utils.board_utils import bitboards_to_planes
 
 def train(args):
+    # Resolve the project directories on the external drive
+    config.ensure_dirs()
+    
     # Set device
     device = torch.device("cuda" if torch.cuda.is_available() and not args.cpu else "cpu")
     print(f"Using device: {device}")
@@ -56,10 +61,23 @@ def train(args):
             print(f"[ERROR] File not found: {pgn_file}")
             return
         
-    dataset = ChessDataset(
-        pgn_files=args.pgn_files,
-        max_positions=args.max_positions
-    )
+    if args.dataset_dir and os.path.exists(os.path.join(args.dataset_dir, 'header.json')):
+        print(f"Using saved dataset: {args.dataset_dir}")
+        dataset = ChessDatasetMmap(args.dataset_dir)
+    elif args.in_memory and not args.dataset_dir and not args.no_cache:
+        dataset = load_cached_dataset(
+            pgn_files=args.pgn_files,
+            cache_dir=os.path.join(config.DATA_DIR, 'cache'),
+            max_positions=args.max_positions
+        )
+    else:
+        dataset_cls = InMemoryChessDataset if args.in_memory else ChessDataset
+        dataset = dataset_cls(
+            pgn_files=args.pgn_files,
+            max_positions=args.max_positions
+        )
+        if args.dataset_dir and args.in_memory:
+            dataset.save(args.dataset_dir)
     print(f"Dataset size: {len(dataset):,} positions")
     
     if len(dataset) == 0:
@@ -77,9 +95,10 @@ def train(args):
         dataloader = DataLoader(
             dataset,
             batch_size=args.batch_size,
-            shuffle=False,  # Shuffle is not supported for IterableDataset
+            shuffle=not isinstance(dataset, IterableDataset),  # Shuffle is not supported for IterableDataset
             num_workers=args.num_workers,
-            pin_memory=torch.cuda.is_available() and not args.cpu
+            collate_fn=collate_samples,
+            pin_memory=device.type == 'cuda'  # Pinned batches allow asynchronous host-to-device copies
         )
         print(f"Number of batches: {len(dataloader):,}")
         
@@ -90,14 +109,9 @@ def train(args):
             batch = next(test_iter)
             positions, move_indices, values = batch
             
-            # Convert move indices to one-hot policy vectors
-            policies = torch.zeros(move_indices.shape[0], 4096, dtype=torch.float32)
-            for i, idx in enumerate(move_indices):
-                policies[i, idx] = 1.0
-            
             print(f"Successfully loaded first batch:")
-            print(f"  Positions shape: {positions.shape}")
-            print(f"  Policies shape: {policies.shape}")
+            print(f"  Positions shape: {bitboards_to_planes(positions).shape}")
+            print(f"  Move indices shape: {move_indices.shape}")
             print(f"  Values shape: {values.shape}")
         except Exception as e:
             print(f"Error loading first batch: {str(e)}")
@@ -118,22 +132,17 @@ def train(args):
             for batch in progress_bar:
                 positions, move_indices, values = batch
                 
-                # Convert move indices to one-hot policy vectors
-                policies = torch.zeros(move_indices.shape[0], 4096, dtype=torch.float32)
-                for i, idx in enumerate(move_indices):
-                    policies[i, idx] = 1.0
-                
-                # Move data to device and ensure correct dtype
-                positions = positions.to(device).float()  # Ensure float32
-                policies = policies.to(device)
-                values = values.to(device).float().view(-1, 1)  # Reshape to [batch_size, 1] and ensure float32
+                # Move data to device and expand bitboards to float32 planes there
+                positions = bitboards_to_planes(positions.to(device, non_blocking=True))
+                move_indices = move_indices.to(device, non_blocking=True)
+                values = values.to(device, non_blocking=True).float()
                 
                 # Forward pass
                 value_pred, policy_pred = model(positions)
                 
                 # Calculate losses
                 value_loss = value_loss_fn(value_pred, values)
-                policy_loss = policy_loss_fn(policy_pred, policies)
+                policy_loss = policy_loss_fn(policy_pred, move_indices)
                 loss = value_loss + policy_loss
                 
                 # Backward pass
@@ -159,7 +168,7 @@ def train(args):
             
             # Save checkpoint
             if (epoch + 1) % args.save_every == 0:
-                checkpoint_path = os.path.join(CHECKPOINTS_DIR, f"model_epoch_{epoch+1}.pt")
+                checkpoint_path = os.path.join(config.CHECKPOINTS_DIR, f"model_epoch_{epoch+1}.pt")
                 torch.save({
                     'epoch': epoch + 1,
                     'model_state_dict': model.state_dict(),
@@ -178,9 +187,15 @@ def main():
     
     # Data arguments
     parser.add_argument('--pgn_files', nargs='+', required=True,
-                        help='List of PGN files to train on')
+                        help='List of PGN files to train on (.pgn.zst files are decompressed on the fly with --in_memory)')
     parser.add_argument('--max_positions', type=int, default=None,
                         help='Maximum number of positions to load (for debugging)')
+    parser.add_argument('--in_memory', action='store_true',
+                        help='Load all positions into memory (enables shuffling)')
+    parser.add_argument('--dataset_dir', type=str, default=None,
+                        help='Directory to save the parsed --in_memory dataset to, or to load it from if already saved')
+    parser.add_argument('--no_cache', action='store_true',
+                        help='Always reparse the PGN files instead of using the --in_memory dataset cache')
     
     # Model arguments
     parser.add_argument('--num_res_blocks', type=int, default=8,
@@ -6,20 +6,19 @@ import subprocess
 from pathlib import Path
 import shutil
 import calendar
-import humanize
 from tqdm import tqdm
 
 # Add project root to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from config import GAMES_DIR, CHECKPOINTS_DIR, FILTERED_GAMES_PATH
+import config
 
 def get_downloaded_months():
     """Get a list of months that have already been downloaded and filtered."""
     months = []
     
     # Look for directories in GAMES_DIR that match YYYY-MM format
-    for item in os.listdir(GAMES_DIR):
-        dir_path = os.path.join(GAMES_DIR, item)
+    for item in os.listdir(config.GAMES_DIR):
+        dir_path = os.path.join(config.GAMES_DIR, item)
         if os.path.isdir(dir_path) and len(item) == 7 and item[4] == '-':
             # Check if filtered PGN file exists in this directory
             filtered_pgn = os.path.join(dir_path, 'lichess_games_filtered.pgn')
@@ -79,6 +78,7 @@ def main():
                         help='Path to checkpoint to resume from')
     
     args = parser.parse_args()
+    config.ensure_dirs()
     
     # Get list of downloaded months
     months = get_downloaded_months()
@@ -92,7 +92,7 @@ def main():
         print(f"  - {month}")
     
     # Construct list of PGN files
-    pgn_files = [os.path.join(GAMES_DIR, month, 'lichess_games_filtered.pgn') 
+    pgn_files = [os.path.join(config.GAMES_DIR, month, 'lichess_games_filtered.pgn') 
                  for month in months]
     
     # Build training command
@@ -15,47 +15,69 @@ def encode_board(board):
         - 1 channel for side to move
         - 1 channel for castling rights
     """
-    encoded = np.zeros((14, 8, 8), dtype=np.float32)
+    # Unpack the bitboards python-chess maintains instead of probing all 64 squares;
+    # bit i of each bitboard is square i (a1 = 0), so rows are flipped to put rank 8 first
+    bits = np.unpackbits(encode_bitboards(board).astype('<u8', copy=False).view(np.uint8), bitorder='little')
+    encoded = bits.reshape(14, 8, 8)[:, ::-1].astype(np.float32)
     
-    # Mapping from piece types to channel indices
-    piece_to_channel = {
-        chess.PAWN: 0,
-        chess.KNIGHT: 1,
-        chess.BISHOP: 2,
-        chess.ROOK: 3,
-        chess.QUEEN: 4,
-        chess.KING: 5
-    }
+    # Castling rights channel (channel 13): fraction of the four rights still available
+    encoded[13] = encoded[13].sum() / 4.0
     
-    # Fill piece planes
-    for square in chess.SQUARES:
-        piece = board.piece_at(square)
-        if piece is not None:
-            row = 7 - (square // 8)  # Flip row index since chess.SQUARES goes bottom to top
-            col = square % 8
-            base_channel = piece_to_channel[piece.piece_type]
-            
-            if piece.color == chess.WHITE:
-                channel = base_channel
-            else:
-                channel = base_channel + 6  # Black pieces start at channel 6
-                
-            encoded[channel, row, col] = 1.0
+    return encoded
+
+def encode_bitboards(board, out=None):
+    """
+    Encodes a chess board as 14 uint64 bitboards for compact dataset storage.
     
-    # Side to move channel (channel 12)
-    if board.turn == chess.WHITE:
-        encoded[12, :, :] = 1.0
+    Reads the piece bitboards that python-chess already updates incrementally
+    on every push, so no squares are scanned.
     
-    # Castling rights channel (channel 13)
-    castling_rights = sum([
-        board.has_kingside_castling_rights(chess.WHITE),
-        board.has_queenside_castling_rights(chess.WHITE),
-        board.has_kingside_castling_rights(chess.BLACK),
-        board.has_queenside_castling_rights(chess.BLACK),
-    ])
-    encoded[13, :, :] = castling_rights / 4.0
+    Args:
+        board: python-chess Board object
+        out: Optional uint64 array of shape (14,) to write into (e.g. a row of a dataset array)
+        
+    Returns:
+        numpy uint64 array of shape (14,) representing:
+        - 12 piece bitboards, in the same channel order as encode_board
+        - 1 side to move bitboard (all squares set when White is to move)
+        - 1 castling rights bitboard (rook squares that still have castling rights)
+    """
+    if out is None:
+        out = np.empty(14, dtype=np.uint64)
     
-    return encoded
+    white = board.occupied_co[chess.WHITE]
+    black = board.occupied_co[chess.BLACK]
+    pawns, knights, bishops = board.pawns, board.knights, board.bishops
+    rooks, queens, kings = board.rooks, board.queens, board.kings
+    out[:] = (
+        pawns & white, knights & white, bishops & white, rooks & white, queens & white, kings & white,
+        pawns & black, knights & black, bishops & black, rooks & black, queens & black, kings & black,
+        chess.BB_ALL if board.turn == chess.WHITE else chess.BB_EMPTY,
+        board.clean_castling_rights(),
+    )
+    return out
+
+def bitboards_to_planes(bitboards):
+    """
+    Expands bitboards from encode_bitboards into the encode_board plane layout.
+    
+    Runs as a handful of vectorized ops on whatever device the input lives on,
+    so a whole batch can be expanded on the GPU after the (small) copy.
+    
+    Args:
+        bitboards: int64 tensor of shape (..., 14) (uint64 bit patterns viewed as int64)
+        
+    Returns:
+        float32 tensor of shape (..., 14, 8, 8)
+    """
+    shifts = torch.arange(64, device=bitboards.device)
+    planes = ((bitboards.unsqueeze(-1) >> shifts) & 1).float()
+    
+    # Castling channel holds the fraction of castling rights on every square
+    planes[..., 13, :] = planes[..., 13, :].sum(dim=-1, keepdim=True) / 4.0
+    
+    # Bit index is rank * 8 + file, but row 0 of the planes is the 8th rank
+    return planes.reshape(*bitboards.shape, 8, 8).flip(-2)
 
 def move_to_index(move):
     """